@@ -0,0 +1,29 @@
+from typing import Iterable
+from starlette.middleware.gzip import GZipMiddleware
+
+class GZipExceptStreamsMiddleware:
+    """
+    GZip responses, except Server-Sent Event streams
+    Starlette's GZipMiddleware keeps streamed chunks in the compressor until
+    the response ends, which would hold back every event; requests to
+    `stream_paths` or accepting text/event-stream are passed through as is.
+    """
+
+    def __init__(self, app, stream_paths: Iterable[str] = (), **gzip_options):
+        self.app = app
+        self.gzip = GZipMiddleware(app, **gzip_options)
+        self.stream_paths = frozenset(stream_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and (
+            scope["path"] in self.stream_paths or _accepts_event_stream(scope)
+        ):
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+def _accepts_event_stream(scope) -> bool:
+    return any(
+        name == b"accept" and b"text/event-stream" in value
+        for name, value in scope["headers"]
+    )
@@ -0,0 +1,15 @@
+from typing import Annotated
+from fastapi import Depends, Request
+from app.services.llm_service import LLMService
+from app.services.ux_generator import UXGenerator
+
+def get_llm_service(request: Request) -> LLMService:
+    """LLM service created once at application startup"""
+    return request.app.state.llm_service
+
+def get_ux_generator(request: Request) -> UXGenerator:
+    """UX generator created once at application startup"""
+    return request.app.state.ux_generator
+
+LLMServiceDep = Annotated[LLMService, Depends(get_llm_service)]
+UXGeneratorDep = Annotated[UXGenerator, Depends(get_ux_generator)]
@@ -0,0 +1,21 @@
+import msgspec
+from typing import Any, Dict, List, Optional
+
+# Typed shapes of the JSON the LLM is prompted to return. Decoded straight
+# from the response text with msgspec; every field has a default because
+# models routinely leave some out.
+
+class ScreenMsg(msgspec.Struct):
+    """A screen of a generated UX specification"""
+    name: str = "Untitled Screen"
+    description: str = ""
+    elements: List[str] = []
+    userFlow: Optional[str] = None
+    interactions: Optional[List[str]] = []
+
+class UXSpecsMsg(msgspec.Struct):
+    """A generated UX specification"""
+    screens: List[ScreenMsg] = []
+    ia_structure: Dict[str, Any] = {}
+    standards: Dict[str, Any] = {}
+    final_prompt_for_image_model: Optional[str] = None
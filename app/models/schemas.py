@@ -80,6 +80,14 @@ class MockupResponse(BaseModel):
     total_generated: int
     generation_time: float
 
+class ValidationResult(BaseModel):
+    """Requirements validation result"""
+    is_valid: bool
+    errors: List[str]
+    warnings: List[str]
+    suggestions: List[str]
+    completeness_score: int
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str
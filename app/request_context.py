@@ -0,0 +1,48 @@
+import logging
+import uuid
+from contextvars import ContextVar
+
+# Id of the request being handled, for correlating log lines
+request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request id to every log record as `request_id`"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id.get()
+        return True
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware that assigns each HTTP request an id
+    Reuses the client's X-Request-ID header when present and echoes the id
+    back on the response. The id is also kept in request.state for code that
+    runs outside this middleware, like the server error handler.
+    Plain ASGI so streamed responses pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rid = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == b"x-request-id"),
+            None
+        ) or uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = rid
+        token = request_id.set(rid)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", rid.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id.reset(token)
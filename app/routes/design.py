@@ -1,23 +1,26 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict
 from app.models.schemas import RequirementsInput, UXSpecification, AIModel
-from app.services.llm_service import LLMService
-from app.services.ux_generator import UXGenerator
+from app.dependencies import UXGeneratorDep
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-llm_service = LLMService()
-ux_generator = UXGenerator(llm_service)
-
 @router.post("/generate-design", response_model=UXSpecification)
-async def generate_design(requirements: RequirementsInput, background_tasks: BackgroundTasks):
+async def generate_design(
+    requirements: RequirementsInput,
+    background_tasks: BackgroundTasks,
+    ux_generator: UXGeneratorDep
+):
     """
     Generate comprehensive UX specifications from requirements
     Using multi-role AI analysis (Designer, BA, Architect)
     """
     try:
-        logger.info(f"Generating UX design for purpose: {requirements.purpose}")
+        logger.info("Generating UX design for purpose: %s", requirements.purpose)
         
         # Generate UX specifications using multi-role AI analysis
         ux_specs = await ux_generator.generate_specifications(requirements)
@@ -28,21 +31,47 @@ async def generate_design(requirements: RequirementsInput, background_tasks: Bac
         return ux_specs
         
     except Exception as e:
-        logger.error(f"Error generating UX design: {str(e)}")
+        logger.error("Error generating UX design: %s", e)
         raise HTTPException(
             status_code=500, 
             detail=f"Failed to generate UX specifications: {str(e)}"
         )
 
+@router.post("/generate-design/stream")
+async def generate_design_stream(
+    requirements: RequirementsInput,
+    ux_generator: UXGeneratorDep
+):
+    """
+    Stream UX specifications as Server-Sent Events
+    Sends role_insights, then each screen as it is generated, then done
+    """
+    logger.info("Streaming UX design for purpose: %s", requirements.purpose)
+    
+    async def events() -> AsyncIterator[bytes]:
+        async for event, data in ux_generator.stream_specifications(requirements):
+            yield sse_event(event, data)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def sse_event(event: str, data: Dict[str, Any]) -> bytes:
+    """Encode one Server-Sent Event with a JSON payload"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
 @router.post("/generate-design-with-model")
 async def generate_design_with_model(
     requirements: RequirementsInput, 
+    ux_generator: UXGeneratorDep,
     model: AIModel = AIModel.LLAMA3_70B,
     background_tasks: BackgroundTasks = None
 ):
     """Generate UX specifications with specific AI model"""
     try:
-        logger.info(f"Generating UX design with model {model}")
+        logger.info("Generating UX design with model %s", model)
         
         ux_specs = await ux_generator.generate_specifications(
             requirements, 
@@ -55,7 +84,7 @@ async def generate_design_with_model(
         return ux_specs
         
     except Exception as e:
-        logger.error(f"Error generating UX design with model {model}: {str(e)}")
+        logger.error("Error generating UX design with model %s: %s", model, e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate UX specifications with {model}: {str(e)}"
@@ -65,6 +94,6 @@ async def log_generation_event(purpose: str, event_type: str):
     """Background task to log generation events"""
     try:
         # Here you could log to analytics service, database, etc.
-        logger.info(f"Generation event: {event_type} for purpose: {purpose}")
+        logger.info("Generation event: %s for purpose: %s", event_type, purpose)
     except Exception as e:
-        logger.error(f"Failed to log generation event: {str(e)}") 
\ No newline at end of file
+        logger.error("Failed to log generation event: %s", e) 
\ No newline at end of file
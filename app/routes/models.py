@@ -6,6 +6,28 @@ import logging
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Static model catalog, grouped by the API key that enables it
+TOGETHER_LLM_MODELS = (
+    {"name": "Llama 3 70B", "id": AIModel.LLAMA3_70B, "provider": "Together.ai", "status": "available"},
+    {"name": "Llama 3 8B", "id": AIModel.LLAMA3_8B, "provider": "Together.ai", "status": "available"}
+)
+HUGGINGFACE_LLM_MODELS = (
+    {"name": "Mistral 7B", "id": AIModel.MISTRAL_7B, "provider": "HuggingFace", "status": "available"},
+    {"name": "Mistral 8x7B", "id": AIModel.MISTRAL_8X7B, "provider": "HuggingFace", "status": "available"},
+    {"name": "Phi-3 Mini", "id": AIModel.PHI3_MINI, "provider": "HuggingFace", "status": "available"},
+    {"name": "Qwen2 72B", "id": AIModel.QWEN2_72B, "provider": "HuggingFace", "status": "available"}
+)
+REPLICATE_VISION_MODELS = (
+    {"name": "Stable Diffusion XL", "id": VisionModel.STABLE_DIFFUSION_XL, "provider": "Replicate", "status": "available"},
+    {"name": "Playground v2", "id": VisionModel.PLAYGROUND_V2, "provider": "Replicate", "status": "available"}
+)
+DEMO_LLM_MODELS = (
+    {"name": "Demo LLM", "id": "demo-llm", "provider": "Demo", "status": "demo_mode"},
+)
+DEMO_VISION_MODELS = (
+    {"name": "Demo Vision", "id": "demo-vision", "provider": "Demo", "status": "demo_mode"},
+)
+
 @router.get("/models")
 async def get_available_models():
     """Get available AI models and their status"""
@@ -20,34 +42,19 @@ async def get_available_models():
         
         # LLM Models
         if together_available:
-            available_llm_models.extend([
-                {"name": "Llama 3 70B", "id": AIModel.LLAMA3_70B, "provider": "Together.ai", "status": "available"},
-                {"name": "Llama 3 8B", "id": AIModel.LLAMA3_8B, "provider": "Together.ai", "status": "available"}
-            ])
+            available_llm_models.extend(TOGETHER_LLM_MODELS)
         
         if hf_available:
-            available_llm_models.extend([
-                {"name": "Mistral 7B", "id": AIModel.MISTRAL_7B, "provider": "HuggingFace", "status": "available"},
-                {"name": "Mistral 8x7B", "id": AIModel.MISTRAL_8X7B, "provider": "HuggingFace", "status": "available"},
-                {"name": "Phi-3 Mini", "id": AIModel.PHI3_MINI, "provider": "HuggingFace", "status": "available"},
-                {"name": "Qwen2 72B", "id": AIModel.QWEN2_72B, "provider": "HuggingFace", "status": "available"}
-            ])
+            available_llm_models.extend(HUGGINGFACE_LLM_MODELS)
         
         # Vision Models
         if replicate_available:
-            available_vision_models.extend([
-                {"name": "Stable Diffusion XL", "id": VisionModel.STABLE_DIFFUSION_XL, "provider": "Replicate", "status": "available"},
-                {"name": "Playground v2", "id": VisionModel.PLAYGROUND_V2, "provider": "Replicate", "status": "available"}
-            ])
+            available_vision_models.extend(REPLICATE_VISION_MODELS)
         
         # If no API keys configured, show demo models
         if not any([hf_available, together_available, replicate_available]):
-            available_llm_models = [
-                {"name": "Demo LLM", "id": "demo-llm", "provider": "Demo", "status": "demo_mode"}
-            ]
-            available_vision_models = [
-                {"name": "Demo Vision", "id": "demo-vision", "provider": "Demo", "status": "demo_mode"}
-            ]
+            available_llm_models = list(DEMO_LLM_MODELS)
+            available_vision_models = list(DEMO_VISION_MODELS)
         
         return {
             "llm_models": available_llm_models,
@@ -62,5 +69,5 @@ async def get_available_models():
         }
         
     except Exception as e:
-        logger.error(f"Error getting available models: {str(e)}")
+        logger.error("Error getting available models: %s", e)
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException
-from app.models.schemas import RequirementsInput
+from app.models.schemas import RequirementsInput, ValidationResult
 from app.services.requirements_processor import RequirementsProcessor
 
 router = APIRouter()
@@ -9,20 +9,20 @@ requirements_processor = RequirementsProcessor()
 async def process_requirements(requirements: RequirementsInput):
     """Process and validate user requirements"""
     try:
-        processed = await requirements_processor.process(requirements)
+        result = requirements_processor.process_sync(requirements)
         return {
             "status": "processed",
-            "data": processed,
-            "suggestions": await requirements_processor.get_suggestions(requirements)
+            "data": result["processed"],
+            "suggestions": result["suggestions"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/validate-requirements")
+@router.post("/validate-requirements", response_model=ValidationResult)
 async def validate_requirements(requirements: RequirementsInput):
     """Validate requirements completeness"""
     try:
-        validation_result = await requirements_processor.validate(requirements)
-        return validation_result
+        result = requirements_processor.process_sync(requirements)
+        return result["validation"]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+import asyncio
 import logging
 from datetime import datetime
 
+from app.dependencies import LLMServiceDep
 from app.services.llm_service import LLMService
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -61,48 +61,30 @@ class HTMLScreenResponse(BaseModel):
     generated_at: datetime
 
 @router.post("/generate-screens", response_model=ScreenGenerationResponse)
-async def generate_screens(request: ScreenGenerationRequest):
+async def generate_screens(
+    request: ScreenGenerationRequest,
+    llm_service: LLMServiceDep
+):
     """
     Generate HTML/CSS screen layouts from UX specifications.
     Replaces image generation with clean, editable HTML layouts.
     """
     try:
-        logger.info(f"Generating HTML screens for {len(request.screens)} screens")
+        logger.info("Generating HTML screens for %d screens", len(request.screens))
         
-        llm_service = LLMService()
-        generated_screens = []
+        # Screens are independent, so their LLM calls run concurrently
+        results = await asyncio.gather(
+            *(build_screen(llm_service, screen_spec, request.ui_standards) for screen_spec in request.screens),
+            return_exceptions=True
+        )
         
-        for screen_spec in request.screens:
-            try:
-                # Generate HTML layout using LLM
-                html_layout = await generate_html_layout(
-                    llm_service, 
-                    screen_spec.name, 
-                    screen_spec.description,
-                    screen_spec.elements,
-                    request.ui_standards
-                )
-                
-                # Create editable elements list
-                editable_elements = create_editable_elements(screen_spec.elements)
-                
-                # Create screen object
-                screen = Screen(
-                    id=f"screen_{screen_spec.name.lower().replace(' ', '_')}",
-                    name=screen_spec.name,
-                    description=screen_spec.description,
-                    html_layout=html_layout,
-                    elements=editable_elements,
-                    generated_at=datetime.now()
-                )
-                
-                generated_screens.append(screen)
-                logger.info(f"Generated HTML layout for screen: {screen_spec.name}")
-                
-            except Exception as e:
-                logger.error(f"Failed to generate screen {screen_spec.name}: {str(e)}")
+        generated_screens = []
+        for screen_spec, result in zip(request.screens, results):
+            if isinstance(result, Exception):
+                logger.error("Failed to generate screen %s: %s", screen_spec.name, result)
                 # Continue with other screens even if one fails
                 continue
+            generated_screens.append(result)
         
         if not generated_screens:
             raise HTTPException(status_code=500, detail="Failed to generate any screens")
@@ -115,9 +97,38 @@ async def generate_screens(request: ScreenGenerationRequest):
         )
         
     except Exception as e:
-        logger.error(f"Screen generation failed: {str(e)}")
+        logger.error("Screen generation failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Screen generation failed: {str(e)}")
 
+async def build_screen(llm_service: LLMService, screen_spec: ScreenSpec, ui_standards: str) -> Screen:
+    """
+    Generate the HTML layout and editable elements for a single screen.
+    """
+    # Generate HTML layout using LLM
+    html_layout = await generate_html_layout(
+        llm_service, 
+        screen_spec.name, 
+        screen_spec.description,
+        screen_spec.elements,
+        ui_standards
+    )
+    
+    # Create editable elements list
+    editable_elements = create_editable_elements(screen_spec.elements)
+    
+    # Create screen object
+    screen = Screen(
+        id=f"screen_{screen_spec.name.lower().replace(' ', '_')}",
+        name=screen_spec.name,
+        description=screen_spec.description,
+        html_layout=html_layout,
+        elements=editable_elements,
+        generated_at=datetime.now()
+    )
+    
+    logger.info("Generated HTML layout for screen: %s", screen_spec.name)
+    return screen
+
 async def generate_html_layout(llm_service: LLMService, screen_name: str, description: str, elements: List[str], ui_standards: str) -> str:
     """
     Generate HTML/CSS layout using LLM instead of image generation.
@@ -147,7 +158,7 @@ async def generate_html_layout(llm_service: LLMService, screen_name: str, descri
         response = await llm_service.generate_html_layout(prompt)
         return response.strip()
     except Exception as e:
-        logger.error(f"LLM HTML generation failed: {str(e)}")
+        logger.error("LLM HTML generation failed: %s", e)
         # Return a fallback HTML layout
         return generate_fallback_html(screen_name, description, elements)
 
@@ -191,7 +202,7 @@ def generate_element_html(elements: List[str]) -> str:
             html_parts.append(f"""
                 <div style="margin-bottom: 1rem;">
                     <label style="display: block; margin-bottom: 0.5rem; font-weight: 500; color: #374151;">{element}</label>
-                    <input type="text" placeholder="Enter {element.lower()}" style="width: 100%; padding: 0.75rem; border: 1px solid #d1d5db; border-radius: 6px; font-size: 1rem;">
+                    <input type="text" placeholder="Enter {element_lower}" style="width: 100%; padding: 0.75rem; border: 1px solid #d1d5db; border-radius: 6px; font-size: 1rem;">
                 </div>
             """)
         elif 'text' in element_lower or 'paragraph' in element_lower:
@@ -217,10 +228,11 @@ def create_editable_elements(elements: List[str]) -> List[Element]:
     editable_elements = []
     
     for i, element in enumerate(elements):
-        element_type = determine_element_type(element)
+        element_lower = element.lower()
+        element_type = determine_element_type(element_lower)
         
         editable_element = Element(
-            id=f"element_{i}_{element.lower().replace(' ', '_')}",
+            id=f"element_{i}_{element_lower.replace(' ', '_')}",
             type=element_type,
             content=element,
             position={"x": 50 + (i * 20), "y": 100 + (i * 80)},
@@ -239,12 +251,10 @@ def create_editable_elements(elements: List[str]) -> List[Element]:
     
     return editable_elements
 
-def determine_element_type(element: str) -> str:
+def determine_element_type(element_lower: str) -> str:
     """
-    Determine the UI element type based on the element name.
+    Determine the UI element type from an already-lowercased element name.
     """
-    element_lower = element.lower()
-    
     if any(keyword in element_lower for keyword in ['button', 'btn', 'submit', 'action']):
         return "button"
     elif any(keyword in element_lower for keyword in ['input', 'field', 'form', 'text']):
@@ -0,0 +1,70 @@
+import functools
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+from pydantic import BaseModel
+
+_MISSING = object()
+
+class LRUCache:
+    """
+    Small in-process least-recently-used cache
+    Entries optionally expire `ttl` seconds after they were stored.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (value, expiry time or None)
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key and mark it as recently used"""
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        value, expires_at = self._data[key]
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry if full"""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+def fingerprint(model: BaseModel) -> str:
+    """
+    Stable hash of a Pydantic model's contents.
+    Serialized straight to JSON bytes by pydantic-core; field order is fixed
+    by the model definition, so equal models always hash the same.
+    """
+    payload = model.__pydantic_serializer__.to_json(model)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def cached(key: Callable[..., Hashable], maxsize: int = 256):
+    """
+    Memoize a sync function in an LRUCache.
+    `key` receives the call arguments and returns the cache key.
+    Cached values are shared between callers and must not be mutated.
+    """
+    def decorator(func):
+        cache = LRUCache(maxsize)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs)
+            value = cache.get(cache_key, _MISSING)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                cache.set(cache_key, value)
+            return value
+        return wrapper
+
+    return decorator
@@ -0,0 +1,87 @@
+import hashlib
+import logging
+from typing import Dict, Any, Optional
+import httpx
+import orjson
+from app.models.llm_output import UXSpecsMsg
+from app.models.schemas import AIModel, RequirementsInput
+from app.services.cache import LRUCache
+from app.services.llm_service import CACHE_COMPLETIONS, LLM_CACHE_TTL, LLMService, FallbackAnalysis
+
+logger = logging.getLogger(__name__)
+
+class CachedLLMService(LLMService):
+    """
+    LLMService with an exact-match cache in front of the generation calls
+    Identical requirements (and model / role insights) are answered from
+    memory for LLM_CACHE_TTL seconds instead of re-running the LLM.
+    Bypassed unless completions are deterministic (LLM_TEMPERATURE is 0).
+    """
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        maxsize: int = 512,
+        ttl: Optional[float] = None
+    ):
+        super().__init__(http_client)
+        self._result_cache = LRUCache(maxsize=maxsize, ttl=LLM_CACHE_TTL if ttl is None else ttl)
+
+    async def generate_multi_role_analysis(
+        self,
+        requirements: RequirementsInput,
+        model: AIModel = AIModel.LLAMA3_70B
+    ) -> Dict[str, Any]:
+        """Multi-role analysis, served from cache when available"""
+        if not CACHE_COMPLETIONS:
+            return await super().generate_multi_role_analysis(requirements, model)
+
+        key = _cache_key("multi_role", model.value, requirements)
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            logger.debug("Multi-role analysis cache hit")
+            return cached
+
+        result = await super().generate_multi_role_analysis(requirements, model)
+        # Don't pin the static fallback in place of a real analysis
+        if not isinstance(result, FallbackAnalysis):
+            self._result_cache.set(key, result)
+        return result
+
+    async def generate_ux_specifications(
+        self,
+        requirements: RequirementsInput,
+        role_insights: Optional[Dict[str, str]] = None,
+        batchable: bool = True
+    ) -> UXSpecsMsg:
+        """UX specifications, served from cache when available"""
+        if not CACHE_COMPLETIONS:
+            return await super().generate_ux_specifications(requirements, role_insights, batchable)
+
+        key = _cache_key("ux_spec", AIModel.LLAMA3_70B.value, requirements, role_insights)
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            logger.debug("UX specification cache hit")
+            return cached
+
+        result = await super().generate_ux_specifications(requirements, role_insights, batchable)
+        self._result_cache.set(key, result)
+        return result
+
+def _cache_key(
+    kind: str,
+    model: str,
+    requirements: RequirementsInput,
+    role_insights: Optional[Dict[str, str]] = None
+) -> str:
+    """sha256 over everything that goes into the prompt, with sorted keys"""
+    payload = orjson.dumps(
+        {
+            "kind": kind,
+            "model": model,
+            "requirements": requirements.model_dump(),
+            "role_insights": role_insights
+        },
+        option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.sha256(payload).hexdigest()
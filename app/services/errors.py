@@ -0,0 +1,8 @@
+import httpx
+
+class LLMProviderError(Exception):
+    """An LLM provider rejected a request or returned an unusable response"""
+
+# Failures expected from upstream LLM calls (network, HTTP status, malformed
+# payloads); callers log these briefly and fall back instead of dumping a traceback
+LLM_ERRORS = (httpx.HTTPError, LLMProviderError, KeyError, IndexError, ValueError)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import httpx
+import orjson
+from app.services.errors import LLM_ERRORS, LLMProviderError
+
+logger = logging.getLogger(__name__)
+
+class LLMBatcher:
+    """
+    Micro-batcher for OpenAI-compatible completion endpoints (vLLM, Together)
+    Collects prompts submitted concurrently within a short window and sends
+    them as one `prompt: [...]` request, so they share a single forward pass.
+    """
+
+    def __init__(
+        self,
+        post: Callable[..., Awaitable[httpx.Response]],
+        url: str,
+        token: Optional[str] = None,
+        temperature: float = 0.7,
+        max_batch_size: int = 32,
+        max_wait: float = 0.02
+    ):
+        # Sends a POST and returns the response, e.g. LLMService._post bound
+        # to a provider so batches are rate limited and retried
+        self.post = post
+        self.url = url
+        self.token = token
+        self.temperature = temperature
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: "asyncio.Queue[Tuple[str, str, asyncio.Future]]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+        self._dispatches = set()
+
+    async def submit(self, prompt: str, model_name: str) -> str:
+        """Queue a prompt and wait for its completion text"""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((model_name, prompt, future))
+        return await future
+
+    async def aclose(self):
+        """Stop the background worker"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _run(self):
+        """Drain the queue every max_wait seconds or whenever a batch fills up"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # A request can only target one model, so split the batch per model
+            by_model: Dict[str, List[Tuple[str, asyncio.Future]]] = {}
+            for model_name, prompt, future in batch:
+                by_model.setdefault(model_name, []).append((prompt, future))
+
+            for model_name, items in by_model.items():
+                task = asyncio.create_task(self._dispatch(model_name, items))
+                self._dispatches.add(task)
+                task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, model_name: str, items: List[Tuple[str, asyncio.Future]]):
+        """Send one batched completion request and resolve each caller's future"""
+        try:
+            headers = {"Content-Type": "application/json"}
+            if self.token:
+                headers["Authorization"] = f"Bearer {self.token}"
+
+            response = await self.post(
+                self.url,
+                headers=headers,
+                json={
+                    "model": model_name,
+                    "prompt": [prompt for prompt, _ in items],
+                    "max_tokens": 2048,
+                    "temperature": self.temperature,
+                    "top_p": 0.9
+                }
+            )
+
+            if response.status_code != 200:
+                raise LLMProviderError(f"Batched completion API error {response.status_code}: {response.text}")
+
+            choices = orjson.loads(response.content)["choices"]
+            texts = {choice.get("index", i): choice["text"] for i, choice in enumerate(choices)}
+
+            for i, (_, future) in enumerate(items):
+                if future.done():
+                    continue
+                if i in texts:
+                    future.set_result(texts[i])
+                else:
+                    future.set_exception(LLMProviderError(f"Batched completion missing choice {i}"))
+
+        except Exception as e:
+            # Every waiting caller must be released, whatever went wrong
+            if isinstance(e, LLM_ERRORS):
+                logger.warning("Batched completion of %d prompts failed: %s", len(items), e)
+            else:
+                logger.exception("Unexpected error in batched completion")
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
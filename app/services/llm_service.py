@@ -1,26 +1,390 @@
 import os
+import asyncio
+import functools
+import hashlib
+import random
 import httpx
 import json
 import logging
-from typing import Dict, Any, Optional
-from app.models.schemas import AIModel, RequirementsInput
+import re
+import msgspec
+import orjson
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+from pydantic import ValidationError
+from app.models.llm_output import ScreenMsg, UXSpecsMsg
+from app.models.schemas import AIModel, RequirementsInput, RoleInsight
+from app.services.cache import LRUCache
+from app.services.errors import LLM_ERRORS, LLMProviderError
+from app.services.llm_batcher import LLMBatcher
+from app.services.rate_limiter import RateLimiter
 
 logger = logging.getLogger(__name__)
 
+# Provider model ids per AIModel
+TOGETHER_MODEL_MAP = {
+    AIModel.LLAMA3_70B: "meta-llama/Llama-3-70b-chat-hf",
+    AIModel.LLAMA3_8B: "meta-llama/Llama-3-8b-chat-hf"
+}
+
+HF_MODEL_MAP = {
+    AIModel.MISTRAL_7B: "mistralai/Mistral-7B-Instruct-v0.1",
+    AIModel.MISTRAL_8X7B: "mistralai/Mixtral-8x7B-Instruct-v0.1",
+    AIModel.PHI3_MINI: "microsoft/Phi-3-mini-4k-instruct",
+    AIModel.QWEN2_72B: "Qwen/Qwen2-72B-Instruct"
+}
+
+# HTML layout generation: raced first, then tried one by one
+HTML_HEDGED_MODELS = (AIModel.LLAMA3_70B, AIModel.LLAMA3_8B)
+HTML_FALLBACK_MODELS = (AIModel.MISTRAL_7B, AIModel.PHI3_MINI)
+
+# Perspectives simulated by the multi-role analysis: role key -> (title, focus)
+ROLES = {
+    "designer": ("Product Designer", "Focuses on user experience, interface design, and usability"),
+    "analyst": ("Business Analyst", "Focuses on requirements analysis, user stories, and business logic"),
+    "architect": ("UX Architect", "Focuses on information architecture, user flows, and system design")
+}
+
+# Upstream request limits per provider, for the whole deployment; each server
+# process enforces its share. `python main.py` sets WORKERS itself; when running
+# `uvicorn main:app --workers N` directly, set WORKERS (or WEB_CONCURRENCY,
+# which uvicorn also reads) to N, or every process allows the full limit.
+# Retries back off exponentially.
+_WORKERS = max(1, int(os.getenv("WORKERS") or os.getenv("WEB_CONCURRENCY") or "1"))
+LLM_MAX_INFLIGHT = max(1, int(os.getenv("LLM_MAX_INFLIGHT", "32")) // _WORKERS)
+LLM_RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", "500")) / _WORKERS
+LLM_MAX_ATTEMPTS = max(1, int(os.getenv("LLM_MAX_ATTEMPTS", "3")))
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+# Backoff sleep used by _send; tests replace it to skip the delays
+_sleep = asyncio.sleep
+
+# Sampling temperature for every completion. Sampled output differs between
+# calls, so completions are only cached (for LLM_CACHE_TTL seconds) at 0.
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+CACHE_COMPLETIONS = LLM_TEMPERATURE == 0
+
+# Static prompt preambles. Request-specific data is always appended after
+# them, so every prompt of a kind starts with the same bytes and providers
+# with automatic prefix caching (vLLM, Together) can reuse the prefill.
+MULTI_ROLE_PROMPT_PREFIX = """
+You are an expert UX design team consisting of three roles:
+""" + "\n".join(
+    f"{i}. {title} - {focus}" for i, (title, focus) in enumerate(ROLES.values(), start=1)
+) + """
+
+Each team member analyzes application requirements from their own perspective.
+
+Focus on:
+- User experience best practices
+- Accessibility standards
+- Modern design patterns
+- Technical feasibility
+- Business value
+"""
+
+UX_SPEC_PROMPT_PREFIX = """
+Based on the requirements below, generate comprehensive UX specifications.
+
+Generate a detailed UX specification in JSON format with:
+{
+    "screens": [
+        {
+            "name": "Screen Name",
+            "description": "What this screen does",
+            "elements": ["list", "of", "ui", "elements"],
+            "userFlow": "How users interact with this screen",
+            "interactions": ["list", "of", "interactions"]
+        }
+    ],
+    "ia_structure": {
+        "navigation": "Main navigation structure",
+        "hierarchy": "Information hierarchy",
+        "relationships": "How screens connect"
+    },
+    "standards": {
+        "accessibility": "Accessibility requirements",
+        "responsive": "Responsive design approach",
+        "patterns": "UI patterns to use"
+    },
+    "final_prompt_for_image_model": "Detailed prompt for generating UI mockups"
+}
+
+Focus on modern UX best practices, accessibility, and user-centered design.
+"""
+
+_JSON_DECODER = json.JSONDecoder()
+
+def _format_requirements(requirements: RequirementsInput) -> str:
+    """
+    Requirements block shared by every prompt, placed right after the static
+    preamble; anything else request-specific (role, insights) comes after it
+    """
+    return f"""
+Application Requirements:
+Purpose: {requirements.purpose}
+Target Audience: {requirements.audience}
+Demographics: {requirements.demographics or 'Not specified'}
+User Goals: {requirements.goals}
+Use Cases: {', '.join(requirements.useCases)}
+"""
+
+def _backoff_seconds(attempt: int, initial: float = 0.5, cap: float = 10.0) -> float:
+    """Exponential backoff for the given retry attempt (0-based), with jitter"""
+    return min(cap, initial * 2 ** attempt) + random.uniform(0, 0.25)
+
+def _retry_after_seconds(response: httpx.Response, default: float = 1.0, cap: float = 10.0) -> float:
+    """Delay requested by a 429/503 response's Retry-After header, in seconds"""
+    try:
+        return min(float(response.headers["Retry-After"]), cap)
+    except (KeyError, ValueError):
+        return default
+
+async def _iter_sse_events(response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+    """Yield decoded JSON payloads from a server-sent events response"""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        payload = line[5:].strip()
+        if payload == "[DONE]":
+            break
+        if payload:
+            yield orjson.loads(payload)
+
+# Role mention (optionally prefixed by its title word) followed by its section text
+ROLE_SECTION_RE = re.compile(
+    r'(?is)(?P<role>designer|analyst|architect)\b[:\-\s]*(?P<body>.*?)'
+    r'(?=(?:(?:product|business|ux)\s+)?(?:designer|analyst|architect)\b|\Z)'
+)
+
+def _decode_first_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode the first complete JSON object embedded in LLM output.
+    The common case (one object, possibly wrapped in prose) is parsed by
+    orjson in one go; otherwise parse from each '{' in turn, so stray braces
+    before or after the object do not break extraction.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    
+    try:
+        obj = orjson.loads(text[start:text.rfind('}') + 1])
+        if isinstance(obj, dict):
+            return obj
+    except orjson.JSONDecodeError:
+        pass
+    
+    while start != -1:
+        try:
+            obj, _end = _JSON_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            start = text.find('{', start + 1)
+            continue
+        if isinstance(obj, dict):
+            return obj
+        start = text.find('{', start + 1)
+    return None
+
+class _ScreenStreamParser:
+    """
+    Picks complete screen objects out of a streamed UX specification
+    Tracks just enough JSON structure (nesting, strings, top-level keys) to
+    spot each object of the top-level "screens" array as it closes, and
+    decodes it on its own. Text no longer needed is dropped as it is scanned.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None
+        self._screens_depth: Optional[int] = None
+        self._screen_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[ScreenMsg]:
+        """Add streamed text; returns the screens it completed"""
+        screens = []
+        buf = self._buf = self._buf + chunk
+        stack = self._stack
+        i = self._pos
+        
+        while i < len(buf) and not self._done:
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if len(stack) == 1:
+                        self._last_key = buf[self._string_start + 1:i]
+            elif not stack:
+                # Skip any prose before the object
+                if c == '{':
+                    stack.append(c)
+            elif c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == '{' or c == '[':
+                if c == '{' and len(stack) == self._screens_depth:
+                    self._screen_start = i
+                stack.append(c)
+                if c == '[' and len(stack) == 2 and self._last_key == "screens" and self._screens_depth is None:
+                    self._screens_depth = 2
+            elif c == '}' or c == ']':
+                stack.pop()
+                if self._screen_start is not None and len(stack) == self._screens_depth:
+                    try:
+                        screens.append(msgspec.json.decode(buf[self._screen_start:i + 1], type=ScreenMsg))
+                    except msgspec.DecodeError as e:
+                        raise LLMProviderError(f"Invalid screen in UX specification: {e}") from e
+                    self._screen_start = None
+                elif self._screens_depth is not None and len(stack) < self._screens_depth:
+                    # The screens array closed; later arrays are not screens
+                    self._screens_depth = -1
+                if not stack:
+                    self._done = True
+            i += 1
+        
+        # Keep only what a later chunk may still need to slice
+        if self._screen_start is not None:
+            keep = self._screen_start
+        elif self._in_string and len(stack) == 1:
+            keep = self._string_start
+        else:
+            keep = i
+        self._buf = buf[keep:]
+        self._pos = i - keep
+        self._string_start -= keep
+        if self._screen_start is not None:
+            self._screen_start -= keep
+        return screens
+
+# Served when every model fails; stripped once here since callers strip responses
+BASIC_HTML_FALLBACK = """
+<div style="width: 100%; min-height: 100vh; background: #f8fafc; font-family: Inter, -apple-system, BlinkMacSystemFont, sans-serif;">
+    <header style="background: #3b82f6; color: white; padding: 1.5rem 2rem; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
+        <h1 style="margin: 0; font-size: 1.75rem; font-weight: 600;">Application Screen</h1>
+    </header>
+    
+    <main style="padding: 2rem; max-width: 1200px; margin: 0 auto;">
+        <div style="background: white; border-radius: 12px; padding: 2rem; box-shadow: 0 4px 6px rgba(0,0,0,0.05); border: 1px solid #e5e7eb;">
+            <h2 style="margin: 0 0 1.5rem 0; color: #1f2937; font-size: 1.5rem; font-weight: 600;">Welcome</h2>
+            <p style="color: #6b7280; line-height: 1.6; margin-bottom: 2rem;">This is a placeholder screen layout. The actual content will be generated based on your requirements.</p>
+            
+            <div style="display: grid; gap: 1rem; margin-bottom: 2rem;">
+                <button style="background: #10b981; color: white; border: none; border-radius: 8px; padding: 0.875rem 2rem; font-weight: 500; font-size: 1rem; cursor: pointer; transition: all 0.2s; box-shadow: 0 2px 4px rgba(16, 185, 129, 0.2);">
+                    Primary Action
+                </button>
+                <button style="background: #f3f4f6; color: #374151; border: 1px solid #d1d5db; border-radius: 8px; padding: 0.875rem 2rem; font-weight: 500; font-size: 1rem; cursor: pointer; transition: all 0.2s;">
+                    Secondary Action
+                </button>
+            </div>
+            
+            <div style="background: #f9fafb; border: 1px solid #e5e7eb; border-radius: 8px; padding: 1.5rem;">
+                <h3 style="margin: 0 0 0.5rem 0; color: #111827; font-size: 1.125rem; font-weight: 500;">Information Panel</h3>
+                <p style="margin: 0; color: #6b7280; font-size: 0.875rem;">Additional content and information would appear here based on your specific requirements.</p>
+            </div>
+        </div>
+    </main>
+</div>
+""".strip()
+
+def create_http_client() -> httpx.AsyncClient:
+    """Pooled HTTP/2 client for LLM provider calls"""
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(120.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+    )
+
+class FallbackAnalysis(dict):
+    """Role insights produced without an LLM; never cached"""
+
 class LLMService:
     """
     LLM Service for integrating with open-source AI models
     Following TUX.txt specification for HuggingFace, Together.ai, etc.
     """
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         self.hf_token = os.getenv("HUGGINGFACE_API_KEY")
         self.together_token = os.getenv("TOGETHER_API_KEY")
         self.base_urls = {
             "huggingface": "https://api-inference.huggingface.co/models/",
             "together": "https://api.together.xyz/inference"
         }
+        # Shared client so keep-alive connections (and HTTP/2 streams) are
+        # reused across LLM calls instead of paying a TLS handshake each time;
+        # a client passed in is owned (and closed) by the caller
+        self._owns_client = http_client is None
+        self._client = http_client if http_client is not None else create_http_client()
+        # Optional OpenAI-compatible endpoint accepting `prompt: [...]` arrays
+        # (e.g. vLLM's /v1/completions); limited like any other provider
+        batch_url = os.getenv("LLM_BATCH_URL")
+        if batch_url:
+            self.base_urls["batch"] = batch_url
+        # Caps concurrent and per-minute upstream requests per provider so
+        # bursts queue here instead of turning into 429s; one slow provider
+        # can't starve the other
+        self._sems = {provider: asyncio.Semaphore(LLM_MAX_INFLIGHT) for provider in self.base_urls}
+        self._limiters = {provider: RateLimiter(LLM_RATE_LIMIT_RPM, 60.0) for provider in self.base_urls}
+        # AIModel -> provider call; everything not served by Together goes to HuggingFace
+        self._providers = {
+            model: self._call_together_api if model in TOGETHER_MODEL_MAP else self._call_huggingface_api
+            for model in AIModel
+        }
+        self._stream_providers = {
+            model: self._stream_together_api if model in TOGETHER_MODEL_MAP else self._stream_huggingface_api
+            for model in AIModel
+        }
+        # (model, prompt digest) -> completion text for repeated identical
+        # prompts; only used when CACHE_COMPLETIONS
+        self._response_cache = LRUCache(maxsize=256, ttl=LLM_CACHE_TTL)
+        # Concurrent prompts for the batch endpoint are sent together, through
+        # _post so they share its concurrency cap, rate limit and retries
+        self._batcher = LLMBatcher(
+            functools.partial(self._post, "batch"),
+            batch_url,
+            token=os.getenv("LLM_BATCH_API_KEY", self.together_token),
+            temperature=LLM_TEMPERATURE,
+            max_batch_size=int(os.getenv("LLM_BATCH_SIZE", "32")),
+            max_wait=float(os.getenv("LLM_BATCH_WAIT_MS", "20")) / 1000
+        ) if batch_url else None
+
+    async def aclose(self):
+        """Stop the batcher and close the HTTP client if this service created it"""
+        if self._batcher is not None:
+            await self._batcher.aclose()
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def healthcheck(self) -> Dict[str, bool]:
+        """
+        Send a 1-token completion to each configured provider
+        Opens pooled connections (DNS, TLS, HTTP/2) before real traffic
+        arrives; returns whether each provider answered.
+        """
+        probes = {}
+        if self.together_token:
+            probes["together"] = self._call_together_api("ping", AIModel.LLAMA3_8B, max_tokens=1)
+        if self.hf_token:
+            probes["huggingface"] = self._call_huggingface_api("ping", AIModel.MISTRAL_7B, max_tokens=1)
         
+        results = await asyncio.gather(*probes.values(), return_exceptions=True)
+        status = {}
+        for provider, result in zip(probes, results):
+            status[provider] = not isinstance(result, BaseException)
+            if not status[provider]:
+                logger.warning("%s healthcheck failed: %s", provider, result)
+        return status
+
     async def generate_multi_role_analysis(
         self, 
         requirements: RequirementsInput, 
@@ -31,256 +395,370 @@ class LLMService:
         Simulates Product Designer, Business Analyst, and UX Architect
         """
         
-        prompt = self._build_multi_role_prompt(requirements)
+        roles = tuple(ROLES)
+        requirements_block = _format_requirements(requirements)
         
         try:
-            if model in [AIModel.LLAMA3_70B, AIModel.LLAMA3_8B]:
-                response = await self._call_together_api(prompt, model)
-            else:
-                response = await self._call_huggingface_api(prompt, model)
-                
-            return self._parse_multi_role_response(response)
+            # Each perspective is independent, so the three calls run concurrently
+            # and each is parsed as soon as its own response arrives
+            insights = await asyncio.gather(*(
+                self._role_call(role, requirements_block, model) for role in roles
+            ))
+            return dict(zip(roles, insights))
             
-        except Exception as e:
-            logger.error(f"Error in multi-role analysis: {str(e)}")
-            # Fallback to simpler model
+        except LLM_ERRORS as e:
+            logger.warning("Multi-role analysis failed, using fallback: %s", e)
+            return await self._fallback_analysis(requirements)
+        except Exception:
+            logger.exception("Unexpected error in multi-role analysis")
             return await self._fallback_analysis(requirements)
     
+    async def _role_call(self, role: str, requirements_block: str, model: AIModel) -> str:
+        """Analyze the requirements from a single role's perspective"""
+        response = await self._call_llm(self._build_role_prompt(requirements_block, role), model, batchable=True)
+        parsed = self._parse_multi_role_response(response)
+        return parsed.get(role) or response.strip()
+    
     async def generate_ux_specifications(
         self, 
         requirements: RequirementsInput,
-        role_insights: Optional[Dict[str, str]] = None
-    ) -> Dict[str, Any]:
-        """Generate detailed UX specifications"""
+        role_insights: Optional[Dict[str, str]] = None,
+        batchable: bool = True
+    ) -> UXSpecsMsg:
+        """
+        Generate detailed UX specifications
+        Concurrent requests' spec prompts share one batched completion unless
+        batchable is False; a batched prompt keeps generating when cancelled.
+        """
         
         prompt = self._build_ux_spec_prompt(requirements, role_insights)
         
         try:
-            response = await self._call_llm(prompt, AIModel.LLAMA3_70B)
+            response = await self._call_llm(prompt, AIModel.LLAMA3_70B, batchable=batchable)
             return self._parse_ux_spec_response(response)
-        except Exception as e:
-            logger.error(f"Error generating UX specs: {str(e)}")
+        except LLM_ERRORS as e:
+            logger.warning("Error generating UX specs: %s", e)
             raise
     
-    def _build_multi_role_prompt(self, requirements: RequirementsInput) -> str:
-        """Build prompt for multi-role analysis as specified in TUX.txt"""
-        return f"""
-You are an expert UX design team consisting of three roles:
-1. Product Designer - Focuses on user experience, interface design, and usability
-2. Business Analyst - Focuses on requirements analysis, user stories, and business logic  
-3. UX Architect - Focuses on information architecture, user flows, and system design
-
-Analyze the following application requirements from each perspective:
-
-Purpose: {requirements.purpose}
-Target Audience: {requirements.audience}
-Demographics: {requirements.demographics or 'Not specified'}
-User Goals: {requirements.goals}
-Use Cases: {', '.join(requirements.useCases)}
-
-For each role, provide insights in JSON format:
+    async def stream_ux_specifications(
+        self,
+        requirements: RequirementsInput,
+        role_insights: Optional[Dict[str, str]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream UX specifications as ("screen", ScreenMsg) pairs for each
+        generated screen, followed by one ("spec", UXSpecsMsg) pair
+        """
+        prompt = self._build_ux_spec_prompt(requirements, role_insights)
+        parser = _ScreenStreamParser()
+        chunks = []
+        sent = 0
+        
+        try:
+            # Each screen is sent as soon as its object closes in the token stream
+            async for chunk in self._stream_llm(prompt, AIModel.LLAMA3_70B):
+                chunks.append(chunk)
+                for screen in parser.feed(chunk):
+                    yield "screen", screen
+                    sent += 1
+            ux_specs = self._parse_ux_spec_response("".join(chunks))
+        except LLM_ERRORS as e:
+            logger.warning("Error streaming UX specs: %s", e)
+            raise
+        
+        # Screens the incremental parser could not pick out (unusual layout)
+        for screen in ux_specs.screens[sent:]:
+            yield "screen", screen
+        yield "spec", ux_specs
+    
+    def _build_role_prompt(self, requirements_block: str, role: str) -> str:
+        """Build prompt for a single role of the multi-role analysis as specified in TUX.txt"""
+        return f"""{MULTI_ROLE_PROMPT_PREFIX}{requirements_block}
+Analyze these requirements from the perspective of the {ROLES[role][0]} only.
+Provide your insights in JSON format:
 {{
-    "designer": "Product Designer insights and recommendations",
-    "analyst": "Business Analyst insights and requirements breakdown", 
-    "architect": "UX Architect insights on information architecture and flows"
+    "{role}": "Your insights and recommendations"
 }}
-
-Focus on:
-- User experience best practices
-- Accessibility standards
-- Modern design patterns
-- Technical feasibility
-- Business value
 """
 
     def _build_ux_spec_prompt(self, requirements: RequirementsInput, role_insights: Optional[Dict[str, str]]) -> str:
         """Build prompt for detailed UX specifications"""
         insights_text = ""
         if role_insights:
-            insights_text = f"""
-Previous Role Analysis:
-- Designer: {role_insights.get('designer', '')}
-- Analyst: {role_insights.get('analyst', '')}
-- Architect: {role_insights.get('architect', '')}
-"""
+            # Separate trailing block, so the prompt up to here is identical
+            # with or without insights; fixed role order keeps it byte-identical
+            insights_text = "\nPrevious Role Analysis:\n" + "".join(
+                f"- {role.capitalize()}: {role_insights.get(role, '')}\n" for role in ROLES
+            )
         
-        return f"""
-Based on the following requirements, generate comprehensive UX specifications:
-
-{insights_text}
-
-Requirements:
-Purpose: {requirements.purpose}
-Audience: {requirements.audience}
-Demographics: {requirements.demographics or 'Not specified'}
-Goals: {requirements.goals}
-Use Cases: {', '.join(requirements.useCases)}
-
-Generate a detailed UX specification in JSON format with:
-{{
-    "screens": [
-        {{
-            "name": "Screen Name",
-            "description": "What this screen does",
-            "elements": ["list", "of", "ui", "elements"],
-            "userFlow": "How users interact with this screen",
-            "interactions": ["list", "of", "interactions"]
-        }}
-    ],
-    "ia_structure": {{
-        "navigation": "Main navigation structure",
-        "hierarchy": "Information hierarchy",
-        "relationships": "How screens connect"
-    }},
-    "standards": {{
-        "accessibility": "Accessibility requirements",
-        "responsive": "Responsive design approach",
-        "patterns": "UI patterns to use"
-    }},
-    "final_prompt_for_image_model": "Detailed prompt for generating UI mockups"
-}}
-
-Focus on modern UX best practices, accessibility, and user-centered design.
-"""
+        return f"{UX_SPEC_PROMPT_PREFIX}{_format_requirements(requirements)}{insights_text}"
 
-    async def _call_together_api(self, prompt: str, model: AIModel) -> str:
+    async def _send(self, provider: str, request: httpx.Request, stream: bool = False) -> httpx.Response:
+        """
+        Send a provider request within its rate limit, retrying rate limited,
+        overloaded and timed out requests with exponential backoff (honouring
+        Retry-After) before the caller falls back to another model.
+        Must be called while holding the provider's semaphore.
+        """
+        for attempt in range(LLM_MAX_ATTEMPTS):
+            last_attempt = attempt == LLM_MAX_ATTEMPTS - 1
+            await self._limiters[provider].acquire()
+            try:
+                response = await self._client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                if last_attempt:
+                    raise
+                delay = _backoff_seconds(attempt)
+                logger.warning("Request to %s failed (%s), retrying in %.2fs", request.url.host, e, delay)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                    return response
+                await response.aclose()
+                delay = _retry_after_seconds(response, default=_backoff_seconds(attempt), cap=30.0)
+                logger.warning(
+                    "%s returned %d, retrying in %.2fs", request.url.host, response.status_code, delay
+                )
+            await _sleep(delay)
+    
+    async def _post(self, provider: str, url: str, **kwargs) -> httpx.Response:
+        """POST to a provider within its in-flight request limit"""
+        async with self._sems[provider]:
+            return await self._send(provider, self._client.build_request("POST", url, **kwargs))
+    
+    @asynccontextmanager
+    async def _stream_post(self, provider: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Streaming POST to a provider; the in-flight slot is held until the stream closes"""
+        async with self._sems[provider]:
+            response = await self._send(provider, self._client.build_request("POST", url, **kwargs), stream=True)
+            try:
+                yield response
+            finally:
+                await response.aclose()
+    
+    async def _call_together_api(self, prompt: str, model: AIModel, max_tokens: int = 2048) -> str:
         """Call Together.AI API for Llama models"""
         if not self.together_token:
-            raise Exception("Together.AI API token not configured")
+            raise LLMProviderError("Together.AI API token not configured")
             
-        model_map = {
-            AIModel.LLAMA3_70B: "meta-llama/Llama-3-70b-chat-hf",
-            AIModel.LLAMA3_8B: "meta-llama/Llama-3-8b-chat-hf"
-        }
+        response = await self._post(
+            "together",
+            self.base_urls["together"],
+            headers={
+                "Authorization": f"Bearer {self.together_token}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": TOGETHER_MODEL_MAP.get(model, TOGETHER_MODEL_MAP[AIModel.LLAMA3_8B]),
+                "prompt": prompt,
+                "max_tokens": max_tokens,
+                "temperature": LLM_TEMPERATURE,
+                "top_p": 0.9
+            }
+        )
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.together.xyz/inference",
-                headers={
-                    "Authorization": f"Bearer {self.together_token}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": model_map.get(model, model_map[AIModel.LLAMA3_8B]),
-                    "prompt": prompt,
-                    "max_tokens": 2048,
-                    "temperature": 0.7,
-                    "top_p": 0.9
-                }
-            )
+        if response.status_code != 200:
+            raise LLMProviderError(f"Together.AI API error {response.status_code}: {response.text}")
             
-            if response.status_code != 200:
-                raise Exception(f"Together.AI API error: {response.text}")
-                
-            return response.json()["output"]["choices"][0]["text"]
+        return orjson.loads(response.content)["output"]["choices"][0]["text"]
     
-    async def _call_huggingface_api(self, prompt: str, model: AIModel) -> str:
+    async def _call_huggingface_api(self, prompt: str, model: AIModel, max_tokens: int = 2048) -> str:
         """Call HuggingFace Inference API"""
         if not self.hf_token:
-            raise Exception("HuggingFace API token not configured")
+            raise LLMProviderError("HuggingFace API token not configured")
             
-        model_map = {
-            AIModel.MISTRAL_7B: "mistralai/Mistral-7B-Instruct-v0.1",
-            AIModel.MISTRAL_8X7B: "mistralai/Mixtral-8x7B-Instruct-v0.1",
-            AIModel.PHI3_MINI: "microsoft/Phi-3-mini-4k-instruct",
-            AIModel.QWEN2_72B: "Qwen/Qwen2-72B-Instruct"
-        }
+        model_name = HF_MODEL_MAP.get(model, HF_MODEL_MAP[AIModel.MISTRAL_7B])
         
-        model_name = model_map.get(model, model_map[AIModel.MISTRAL_7B])
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_urls['huggingface']}{model_name}",
-                headers={
-                    "Authorization": f"Bearer {self.hf_token}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "inputs": prompt,
-                    "parameters": {
-                        "max_new_tokens": 2048,
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "return_full_text": False
-                    }
+        response = await self._post(
+            "huggingface",
+            f"{self.base_urls['huggingface']}{model_name}",
+            headers={
+                "Authorization": f"Bearer {self.hf_token}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "inputs": prompt,
+                "parameters": {
+                    "max_new_tokens": max_tokens,
+                    "temperature": LLM_TEMPERATURE,
+                    "top_p": 0.9,
+                    "return_full_text": False
                 }
-            )
+            }
+        )
+        
+        if response.status_code != 200:
+            raise LLMProviderError(f"HuggingFace API error {response.status_code}: {response.text}")
             
+        result = orjson.loads(response.content)
+        if isinstance(result, list):
+            return result[0]["generated_text"]
+        return result["generated_text"]
+    
+    async def _stream_together_api(self, prompt: str, model: AIModel) -> AsyncIterator[str]:
+        """Stream completion text from Together.AI as tokens are generated"""
+        if not self.together_token:
+            raise LLMProviderError("Together.AI API token not configured")
+            
+        async with self._stream_post(
+            "together",
+            self.base_urls["together"],
+            headers={
+                "Authorization": f"Bearer {self.together_token}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": TOGETHER_MODEL_MAP.get(model, TOGETHER_MODEL_MAP[AIModel.LLAMA3_8B]),
+                "prompt": prompt,
+                "max_tokens": 2048,
+                "temperature": LLM_TEMPERATURE,
+                "top_p": 0.9,
+                "stream_tokens": True
+            }
+        ) as response:
             if response.status_code != 200:
-                raise Exception(f"HuggingFace API error: {response.text}")
-                
-            result = response.json()
-            if isinstance(result, list):
-                return result[0]["generated_text"]
-            return result["generated_text"]
+                await response.aread()
+                raise LLMProviderError(f"Together.AI API error {response.status_code}: {response.text}")
+            
+            async for event in _iter_sse_events(response):
+                text = event["choices"][0].get("text")
+                if text:
+                    yield text
+    
+    async def _stream_huggingface_api(self, prompt: str, model: AIModel) -> AsyncIterator[str]:
+        """Stream generated text from the HuggingFace Inference API"""
+        if not self.hf_token:
+            raise LLMProviderError("HuggingFace API token not configured")
+            
+        model_name = HF_MODEL_MAP.get(model, HF_MODEL_MAP[AIModel.MISTRAL_7B])
+        
+        async with self._stream_post(
+            "huggingface",
+            f"{self.base_urls['huggingface']}{model_name}",
+            headers={
+                "Authorization": f"Bearer {self.hf_token}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "inputs": prompt,
+                "stream": True,
+                "parameters": {
+                    "max_new_tokens": 2048,
+                    "temperature": LLM_TEMPERATURE,
+                    "top_p": 0.9,
+                    "return_full_text": False
+                }
+            }
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise LLMProviderError(f"HuggingFace API error {response.status_code}: {response.text}")
+            
+            async for event in _iter_sse_events(response):
+                token = event.get("token") or {}
+                if token.get("text") and not token.get("special"):
+                    yield token["text"]
     
-    async def _call_llm(self, prompt: str, model: AIModel) -> str:
-        """Generic LLM call router"""
-        if model in [AIModel.LLAMA3_70B, AIModel.LLAMA3_8B]:
-            return await self._call_together_api(prompt, model)
+    async def _stream_llm(self, prompt: str, model: AIModel, cacheable: bool = True) -> AsyncIterator[str]:
+        """
+        Generic streaming LLM call router
+        Cacheable prompts are replayed from the response cache when
+        completions are deterministic (LLM_TEMPERATURE is 0).
+        """
+        cache_key = None
+        if cacheable and CACHE_COMPLETIONS:
+            cache_key = (model, hashlib.sha256(prompt.encode()).hexdigest())
+            cached_response = self._response_cache.get(cache_key)
+            if cached_response is not None:
+                yield cached_response
+                return
+        
+        stream = self._stream_providers[model](prompt, model)
+        
+        chunks = []
+        async for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+        
+        if cache_key is not None:
+            self._response_cache.set(cache_key, "".join(chunks))
+    
+    async def _call_llm(self, prompt: str, model: AIModel, batchable: bool = False, cacheable: bool = True) -> str:
+        """
+        Generic LLM call router
+        Batchable Llama prompts go through the micro-batcher when one is configured.
+        Cacheable prompts are replayed from the response cache when
+        completions are deterministic (LLM_TEMPERATURE is 0).
+        """
+        cache_key = None
+        if cacheable and CACHE_COMPLETIONS:
+            cache_key = (model, hashlib.sha256(prompt.encode()).hexdigest())
+            cached_response = self._response_cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+        
+        if batchable and self._batcher is not None and model in TOGETHER_MODEL_MAP:
+            response = await self._batcher.submit(prompt, TOGETHER_MODEL_MAP[model])
         else:
-            return await self._call_huggingface_api(prompt, model)
+            response = await self._providers[model](prompt, model)
+        
+        if cache_key is not None:
+            self._response_cache.set(cache_key, response)
+        return response
     
     def _parse_multi_role_response(self, response: str) -> Dict[str, str]:
         """Parse multi-role analysis response"""
         try:
-            # Try to extract JSON from response
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != -1:
-                json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
-            else:
-                # Fallback parsing
-                return self._extract_role_insights(response)
-        except Exception as e:
-            logger.error(f"Error parsing multi-role response: {str(e)}")
+            parsed = _decode_first_json_object(response)
+            if parsed is not None:
+                try:
+                    return RoleInsight.model_validate(parsed).model_dump(exclude_none=True)
+                except ValidationError as e:
+                    logger.warning("Multi-role JSON did not match schema: %s", e)
+            # Fallback parsing
+            return self._extract_role_insights(response)
+        except Exception:
+            logger.exception("Unexpected error parsing multi-role response")
             return {"designer": "", "analyst": "", "architect": ""}
     
-    def _parse_ux_spec_response(self, response: str) -> Dict[str, Any]:
+    def _parse_ux_spec_response(self, response: str) -> UXSpecsMsg:
         """Parse UX specification response"""
+        # Common case: decode and type-check the embedded object in one pass
+        start = response.find('{')
+        if start != -1:
+            try:
+                return msgspec.json.decode(response[start:response.rfind('}') + 1], type=UXSpecsMsg)
+            except msgspec.ValidationError as e:
+                raise LLMProviderError(f"UX specification JSON did not match schema: {e}") from e
+            except msgspec.DecodeError:
+                pass
+        
+        parsed = _decode_first_json_object(response)
+        if parsed is None:
+            raise LLMProviderError("Failed to parse AI response: Could not extract JSON from response")
         try:
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != -1:
-                json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
-            else:
-                raise Exception("Could not extract JSON from response")
-        except Exception as e:
-            logger.error(f"Error parsing UX spec response: {str(e)}")
-            raise Exception(f"Failed to parse AI response: {str(e)}")
+            return msgspec.convert(parsed, UXSpecsMsg)
+        except msgspec.ValidationError as e:
+            raise LLMProviderError(f"UX specification JSON did not match schema: {e}") from e
     
     def _extract_role_insights(self, response: str) -> Dict[str, str]:
         """Fallback method to extract role insights from unstructured text"""
         insights = {"designer": "", "analyst": "", "architect": ""}
         
-        # Simple pattern matching
-        lines = response.split('\n')
-        current_role = None
-        
-        for line in lines:
-            line = line.strip()
-            if 'designer' in line.lower():
-                current_role = 'designer'
-            elif 'analyst' in line.lower():
-                current_role = 'analyst'  
-            elif 'architect' in line.lower():
-                current_role = 'architect'
-            elif current_role and line:
-                insights[current_role] += line + " "
+        # Each role mention starts a section that runs until the next mention
+        for match in ROLE_SECTION_RE.finditer(response):
+            body = " ".join(match["body"].split())
+            if body:
+                insights[match["role"].lower()] += body + " "
         
         return insights
     
     async def _fallback_analysis(self, requirements: RequirementsInput) -> Dict[str, str]:
         """Fallback multi-role analysis using simpler approach"""
-        return {
+        return FallbackAnalysis({
             "designer": f"Design a user-friendly interface for {requirements.purpose} targeting {requirements.audience}. Focus on accessibility and modern UI patterns.",
             "analyst": f"Break down the requirements: Purpose is {requirements.purpose}. Key use cases: {', '.join(requirements.useCases)}. Ensure business value alignment.",
             "architect": f"Structure the information architecture around {requirements.goals}. Plan user flows for {len(requirements.useCases)} main use cases."
-        }
+        })
 
     async def generate_html_layout(self, prompt: str) -> str:
         """
@@ -288,61 +766,95 @@ Focus on modern UX best practices, accessibility, and user-centered design.
         Replaces image generation with clean, editable HTML layouts.
         """
         try:
-            # Try with the primary model first (Llama-3-70B)
-            response = await self._call_llm(prompt, AIModel.LLAMA3_70B)
-            
-            if response and "<div" in response.lower():
+            # Hedge the primary model (Llama-3-70B) with the first fallback and
+            # take whichever returns usable HTML first
+            response = await self._hedged_html_request(prompt, HTML_HEDGED_MODELS)
+            if response:
                 return response
             
             # Fallback to other models
-            models_to_try = [AIModel.LLAMA3_8B, AIModel.MISTRAL_7B, AIModel.PHI3_MINI]
-            
-            for model in models_to_try:
+            for model in HTML_FALLBACK_MODELS:
                 try:
-                    response = await self._call_llm(prompt, model)
+                    # Regenerating a screen should give a fresh layout, so never cached
+                    response = await self._call_llm(prompt, model, cacheable=False)
                     if response and "<div" in response.lower():
                         return response
                         
-                except Exception as e:
-                    logger.warning(f"Model {model} failed for HTML generation: {str(e)}")
+                except LLM_ERRORS as e:
+                    logger.warning("Model %s failed for HTML generation: %s", model, e)
                     continue
             
             # If all models fail, return a basic HTML structure
-            return self._generate_basic_html_fallback()
+            return BASIC_HTML_FALLBACK
             
-        except Exception as e:
-            logger.error(f"HTML generation failed: {str(e)}")
-            return self._generate_basic_html_fallback()
+        except Exception:
+            logger.exception("HTML generation failed")
+            return BASIC_HTML_FALLBACK
     
-    def _generate_basic_html_fallback(self) -> str:
+    async def _hedged_html_request(self, prompt: str, models: Sequence[AIModel]) -> Optional[str]:
         """
-        Generate a basic HTML fallback when all LLM calls fail.
+        Race the same HTML prompt against several streaming models.
+        The first stream to emit '<div' wins: the others are cancelled right
+        away (closing their connections) while the winner finishes decoding.
+        Returns None when none of them produced usable output.
         """
-        return """
-        <div style="width: 100%; min-height: 100vh; background: #f8fafc; font-family: Inter, -apple-system, BlinkMacSystemFont, sans-serif;">
-            <header style="background: #3b82f6; color: white; padding: 1.5rem 2rem; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
-                <h1 style="margin: 0; font-size: 1.75rem; font-weight: 600;">Application Screen</h1>
-            </header>
-            
-            <main style="padding: 2rem; max-width: 1200px; margin: 0 auto;">
-                <div style="background: white; border-radius: 12px; padding: 2rem; box-shadow: 0 4px 6px rgba(0,0,0,0.05); border: 1px solid #e5e7eb;">
-                    <h2 style="margin: 0 0 1.5rem 0; color: #1f2937; font-size: 1.5rem; font-weight: 600;">Welcome</h2>
-                    <p style="color: #6b7280; line-height: 1.6; margin-bottom: 2rem;">This is a placeholder screen layout. The actual content will be generated based on your requirements.</p>
-                    
-                    <div style="display: grid; gap: 1rem; margin-bottom: 2rem;">
-                        <button style="background: #10b981; color: white; border: none; border-radius: 8px; padding: 0.875rem 2rem; font-weight: 500; font-size: 1rem; cursor: pointer; transition: all 0.2s; box-shadow: 0 2px 4px rgba(16, 185, 129, 0.2);">
-                            Primary Action
-                        </button>
-                        <button style="background: #f3f4f6; color: #374151; border: 1px solid #d1d5db; border-radius: 8px; padding: 0.875rem 2rem; font-weight: 500; font-size: 1rem; cursor: pointer; transition: all 0.2s;">
-                            Secondary Action
-                        </button>
-                    </div>
-                    
-                    <div style="background: #f9fafb; border: 1px solid #e5e7eb; border-radius: 8px; padding: 1.5rem;">
-                        <h3 style="margin: 0 0 0.5rem 0; color: #111827; font-size: 1.125rem; font-weight: 500;">Information Panel</h3>
-                        <p style="margin: 0; color: #6b7280; font-size: 0.875rem;">Additional content and information would appear here based on your specific requirements.</p>
-                    </div>
-                </div>
-            </main>
-        </div>
-        """ 
\ No newline at end of file
+        leader = asyncio.get_running_loop().create_future()
+        
+        def claim_lead():
+            if not leader.done():
+                leader.set_result(asyncio.current_task())
+        
+        pending = {
+            asyncio.create_task(self._stream_html(prompt, model, claim_lead)): model
+            for model in models
+        }
+        
+        try:
+            while pending:
+                done, _ = await asyncio.wait([*pending, leader], return_when=asyncio.FIRST_COMPLETED)
+                
+                if leader.done():
+                    winner = leader.result()
+                    model = pending.pop(winner)
+                    for task in pending:
+                        task.cancel()
+                    try:
+                        return await winner
+                    except LLM_ERRORS as e:
+                        logger.warning("Model %s failed for HTML generation: %s", model, e)
+                        return None
+                
+                for task in done:
+                    model = pending.pop(task)
+                    try:
+                        response = task.result()
+                    except LLM_ERRORS as e:
+                        logger.warning("Model %s failed for HTML generation: %s", model, e)
+                        continue
+                    if response and "<div" in response.lower():
+                        return response
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _stream_html(self, prompt: str, model: AIModel, on_html: Callable[[], None]) -> str:
+        """
+        Stream an HTML completion, calling on_html as soon as '<div' appears.
+        Returns the full response text.
+        """
+        chunks = []
+        tail = ""
+        seen_html = False
+        
+        async for chunk in self._stream_llm(prompt, model, cacheable=False):
+            chunks.append(chunk)
+            if not seen_html:
+                # Keep a few trailing characters so a tag split across chunks still matches
+                window = (tail + chunk).lower()
+                if "<div" in window:
+                    seen_html = True
+                    on_html()
+                tail = window[-3:]
+        
+        return "".join(chunks)
@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+class RateLimiter:
+    """
+    Async token bucket allowing `rate` acquisitions per `period` seconds
+    Callers wait for the next free slot (in arrival order) instead of being
+    rejected, so bursts are spread out rather than sent on to the provider.
+    """
+
+    def __init__(self, rate: float, period: float = 60.0):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
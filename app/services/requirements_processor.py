@@ -1,9 +1,25 @@
 import logging
-from typing import Dict, Any, List
-from app.models.schemas import RequirementsInput
+import re
+from typing import Dict, Any
+from app.models.schemas import RequirementsInput, ValidationResult
+from app.services.cache import cached, fingerprint
 
 logger = logging.getLogger(__name__)
 
+# Keywords per category, matched as substrings of the lowercased field so
+# inflections and compounds ('healthcare', 'smartphone', 'workflow') count
+HEALTH_RE = re.compile(r"fitness|health|workout|exercise")
+BUSINESS_RE = re.compile(r"business|productivity|work|task")
+SOCIAL_RE = re.compile(r"social|chat|message|community")
+MOBILE_AUDIENCE_RE = re.compile(r"mobile|phone|on-the-go")
+DESKTOP_AUDIENCE_RE = re.compile(r"professional|business|office")
+PLATFORM_RE = re.compile(r"mobile|web")
+TRACKING_GOAL_RE = re.compile(r"manage|track")
+
+def _requirements_key(self, requirements: RequirementsInput) -> str:
+    """Cache key for derived fields: identical inputs share one result"""
+    return fingerprint(requirements)
+
 class RequirementsProcessor:
     """
     Service for processing and validating user requirements
@@ -13,168 +29,139 @@ class RequirementsProcessor:
         self.required_fields = ['purpose', 'audience', 'goals', 'use_cases']
         self.optional_fields = ['demographics', 'simulate_roles']
     
-    async def process(self, requirements: RequirementsInput) -> Dict[str, Any]:
-        """Process and enrich requirements"""
-        try:
-            logger.info(f"Processing requirements for: {requirements.purpose}")
-            
-            # Basic processing
-            processed = {
-                "purpose": requirements.purpose.strip(),
-                "audience": requirements.audience.strip(),
-                "demographics": requirements.demographics.strip() if requirements.demographics else None,
-                "goals": requirements.goals.strip(),
-                "use_cases": [uc.strip() for uc in requirements.useCases if uc.strip()],
-                "simulate_roles": requirements.simulateRoles,
-                "processed_at": "2024-01-01T00:00:00Z",  # Would use actual timestamp
-                "completeness_score": self._calculate_completeness(requirements)
-            }
-            
-            # Add derived insights
-            processed["insights"] = await self._generate_insights(requirements)
-            
-            return processed
-            
-        except Exception as e:
-            logger.error(f"Error processing requirements: {str(e)}")
-            raise
-    
-    async def validate(self, requirements: RequirementsInput) -> Dict[str, Any]:
-        """Validate requirements completeness and quality"""
+    @cached(key=_requirements_key, maxsize=512)
+    def process_sync(self, requirements: RequirementsInput) -> Dict[str, Any]:
+        """
+        Process, validate and enrich requirements in a single pass
+        Returns the processed data, the validation result and suggestions;
+        each field is stripped and lowercased once and every check feeds the
+        completeness score, errors, warnings, suggestions and insights together.
+        Pure CPU work with no I/O, so it is a plain function: async callers
+        invoke it directly instead of awaiting a coroutine.
+        """
         try:
-            validation_result = {
-                "is_valid": True,
-                "errors": [],
-                "warnings": [],
-                "suggestions": [],
-                "completeness_score": 0
-            }
+            logger.info("Processing requirements for: %s", requirements.purpose)
             
-            # Check required fields
-            if not requirements.purpose or len(requirements.purpose.strip()) < 10:
-                validation_result["errors"].append("Purpose must be at least 10 characters long")
-                validation_result["is_valid"] = False
-            
-            if not requirements.audience or len(requirements.audience.strip()) < 5:
-                validation_result["errors"].append("Target audience must be specified")
-                validation_result["is_valid"] = False
-            
-            if not requirements.goals or len(requirements.goals.strip()) < 10:
-                validation_result["errors"].append("User goals must be clearly defined")
-                validation_result["is_valid"] = False
-            
-            if not requirements.useCases or len(requirements.useCases) < 1:
-                validation_result["errors"].append("At least one use case must be provided")
-                validation_result["is_valid"] = False
-            
-            # Check for quality warnings
-            if len(requirements.useCases) < 3:
-                validation_result["warnings"].append("Consider adding more use cases for better UX analysis")
+            purpose = requirements.purpose.strip()
+            audience = requirements.audience.strip()
+            goals = requirements.goals.strip()
+            demographics = requirements.demographics.strip() if requirements.demographics else None
+            use_case_count = len(requirements.useCases)
+            purpose_lower = requirements.purpose.lower()
+            audience_lower = requirements.audience.lower()
             
-            if not requirements.demographics:
-                validation_result["warnings"].append("Demographics information would help create more targeted designs")
+            score = 0
+            errors = []
+            warnings = []
+            suggestions = []
+            insights = {}
             
-            # Calculate completeness score
-            validation_result["completeness_score"] = self._calculate_completeness(requirements)
+            # Required fields (60 points total)
+            if len(purpose) >= 10:
+                score += 15
+            else:
+                errors.append("Purpose must be at least 10 characters long")
             
-            # Add suggestions
-            validation_result["suggestions"] = await self.get_suggestions(requirements)
+            if len(audience) >= 5:
+                score += 15
+            else:
+                errors.append("Target audience must be specified")
             
-            return validation_result
+            if len(goals) >= 10:
+                score += 15
+            else:
+                errors.append("User goals must be clearly defined")
             
-        except Exception as e:
-            logger.error(f"Error validating requirements: {str(e)}")
-            raise
-    
-    async def get_suggestions(self, requirements: RequirementsInput) -> List[str]:
-        """Get suggestions for improving requirements"""
-        suggestions = []
-        
-        try:
-            # Purpose-based suggestions
-            if "app" in requirements.purpose.lower():
-                if "mobile" not in requirements.purpose.lower() and "web" not in requirements.purpose.lower():
-                    suggestions.append("Consider specifying if this is a mobile app, web app, or both")
+            if use_case_count >= 1:
+                score += 15
+            else:
+                errors.append("At least one use case must be provided")
             
-            # Audience-based suggestions
-            if "users" in requirements.audience.lower() and not requirements.demographics:
-                suggestions.append("Adding demographic details (age, tech-savviness, etc.) would improve the design")
+            # Quality factors (40 points total)
+            if use_case_count >= 3:
+                score += 10
+            else:
+                warnings.append("Consider adding more use cases for better UX analysis")
             
-            # Use case suggestions
-            if len(requirements.useCases) < 3:
-                suggestions.append("Adding more specific use cases will result in more comprehensive UX specifications")
+            if requirements.demographics:
+                score += 10
+            else:
+                warnings.append("Demographics information would help create more targeted designs")
             
-            # Goal-based suggestions
-            if "manage" in requirements.goals.lower() or "track" in requirements.goals.lower():
-                suggestions.append("Consider adding use cases for data visualization and reporting")
+            if len(requirements.purpose) >= 50:  # Detailed purpose
+                score += 10
+            if len(requirements.goals) >= 50:  # Detailed goals
+                score += 10
             
-            return suggestions
+            # Purpose-based suggestions and app category
+            if "app" in purpose_lower and not PLATFORM_RE.search(purpose_lower):
+                suggestions.append("Consider specifying if this is a mobile app, web app, or both")
             
-        except Exception as e:
-            logger.error(f"Error generating suggestions: {str(e)}")
-            return []
-    
-    def _calculate_completeness(self, requirements: RequirementsInput) -> float:
-        """Calculate completeness score (0-100)"""
-        score = 0
-        
-        # Required fields (60 points total)
-        if requirements.purpose and len(requirements.purpose.strip()) >= 10:
-            score += 15
-        if requirements.audience and len(requirements.audience.strip()) >= 5:
-            score += 15
-        if requirements.goals and len(requirements.goals.strip()) >= 10:
-            score += 15
-        if requirements.useCases and len(requirements.useCases) >= 1:
-            score += 15
-        
-        # Quality factors (40 points total)
-        if requirements.demographics:
-            score += 10
-        if len(requirements.useCases) >= 3:
-            score += 10
-        if len(requirements.purpose) >= 50:  # Detailed purpose
-            score += 10
-        if len(requirements.goals) >= 50:  # Detailed goals
-            score += 10
-        
-        return min(score, 100)
-    
-    async def _generate_insights(self, requirements: RequirementsInput) -> Dict[str, str]:
-        """Generate basic insights about the requirements"""
-        insights = {}
-        
-        try:
-            # App type insight
-            purpose_lower = requirements.purpose.lower()
-            if any(word in purpose_lower for word in ['fitness', 'health', 'workout', 'exercise']):
+            if HEALTH_RE.search(purpose_lower):
                 insights["app_category"] = "Health & Fitness"
-            elif any(word in purpose_lower for word in ['business', 'productivity', 'work', 'task']):
+            elif BUSINESS_RE.search(purpose_lower):
                 insights["app_category"] = "Business & Productivity"
-            elif any(word in purpose_lower for word in ['social', 'chat', 'message', 'community']):
+            elif SOCIAL_RE.search(purpose_lower):
                 insights["app_category"] = "Social & Communication"
             else:
                 insights["app_category"] = "General Application"
             
-            # Complexity insight
-            if len(requirements.useCases) >= 5:
+            # Audience-based suggestions
+            if "users" in audience_lower and not requirements.demographics:
+                suggestions.append("Adding demographic details (age, tech-savviness, etc.) would improve the design")
+            
+            # Use case suggestions and complexity
+            if use_case_count < 3:
+                suggestions.append("Adding more specific use cases will result in more comprehensive UX specifications")
+            
+            if use_case_count >= 5:
                 insights["complexity"] = "High - Multiple features and workflows"
-            elif len(requirements.useCases) >= 3:
+            elif use_case_count >= 3:
                 insights["complexity"] = "Medium - Several key features"
             else:
                 insights["complexity"] = "Low - Simple, focused functionality"
             
+            # Goal-based suggestions
+            if TRACKING_GOAL_RE.search(requirements.goals.lower()):
+                suggestions.append("Consider adding use cases for data visualization and reporting")
+            
             # Target platform suggestion
-            audience_lower = requirements.audience.lower()
-            if any(word in audience_lower for word in ['mobile', 'phone', 'on-the-go']):
+            if MOBILE_AUDIENCE_RE.search(audience_lower):
                 insights["recommended_platform"] = "Mobile-first design recommended"
-            elif any(word in audience_lower for word in ['professional', 'business', 'office']):
+            elif DESKTOP_AUDIENCE_RE.search(audience_lower):
                 insights["recommended_platform"] = "Desktop/web application recommended"
             else:
                 insights["recommended_platform"] = "Cross-platform approach recommended"
             
-            return insights
+            completeness_score = min(score, 100)
             
-        except Exception as e:
-            logger.error(f"Error generating insights: {str(e)}")
-            return {} 
\ No newline at end of file
+            processed = {
+                "purpose": purpose,
+                "audience": audience,
+                "demographics": demographics,
+                "goals": goals,
+                "use_cases": [s for s in (uc.strip() for uc in requirements.useCases) if s],
+                "simulate_roles": requirements.simulateRoles,
+                "processed_at": "2024-01-01T00:00:00Z",  # Would use actual timestamp
+                "completeness_score": completeness_score,
+                "insights": insights
+            }
+            
+            # All values are built here, so skip re-validating them
+            validation = ValidationResult.model_construct(
+                is_valid=not errors,
+                errors=errors,
+                warnings=warnings,
+                suggestions=suggestions,
+                completeness_score=completeness_score
+            )
+            
+            return {
+                "processed": processed,
+                "validation": validation,
+                "suggestions": suggestions
+            }
+            
+        except Exception:
+            logger.exception("Error processing requirements")
+            raise
@@ -1,10 +1,71 @@
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Any, AsyncIterator, FrozenSet, Optional, Tuple
+import msgspec
+from app.models.llm_output import UXSpecsMsg
 from app.models.schemas import RequirementsInput, UXSpecification, RoleInsight, ScreenElement, AIModel
 from app.services.llm_service import LLMService
 
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for role insights before settling for the speculative spec.
+# Cost trade-off: the speculative spec is a second LLM generation per request,
+# cancelled (after already spending tokens) whenever the insights arrive in
+# time. A longer timeout wastes more of them on discarded specs; a shorter one
+# serves more specs generated without role insights
+ROLE_INSIGHTS_TIMEOUT = float(os.getenv("ROLE_INSIGHTS_TIMEOUT", "10"))
+
+# Static parts of the fallback specification, built once and shared between
+# responses; treat them as read-only
+FALLBACK_ROLE_INSIGHTS = RoleInsight.model_construct(
+    designer="Focus on clean, intuitive interface design with clear visual hierarchy",
+    analyst="Ensure all user requirements are met with efficient workflows",
+    architect="Structure information logically with scalable navigation patterns"
+)
+FALLBACK_IA_STRUCTURE = {
+    "navigation": "Top-level navigation with clear categories",
+    "hierarchy": "Dashboard → Feature screens → Detail views",
+    "relationships": "Linear flow with cross-navigation options"
+}
+FALLBACK_STANDARDS = {
+    "accessibility": "WCAG 2.1 AA compliance with proper ARIA labels",
+    "responsive": "Mobile-first design with breakpoints at 768px and 1024px",
+    "patterns": "Material Design principles with consistent spacing and typography"
+}
+
+# Fallback screen names by use case keyword, in priority order
+FALLBACK_SCREEN_NAMES: Tuple[Tuple[str, FrozenSet[str]], ...] = (
+    ("Tracking", frozenset({"log", "track"})),
+    ("Browse", frozenset({"view", "browse"})),
+    ("Management", frozenset({"manage", "edit"})),
+)
+# Lookahead so overlapping keywords are all found in one scan
+_SCREEN_KEYWORD_RE = re.compile(r"(?=(log|track|view|browse|manage|edit))", re.IGNORECASE)
+
+def _fallback_screen_name(use_case: str) -> Optional[str]:
+    """Screen name for a use case, matching keywords anywhere in the text"""
+    found = {keyword.lower() for keyword in _SCREEN_KEYWORD_RE.findall(use_case)}
+    if found:
+        for name, keywords in FALLBACK_SCREEN_NAMES:
+            if found & keywords:
+                return name
+    return None
+
+@lru_cache(maxsize=1024)
+def _fallback_prompt(purpose: str, audience: str, use_cases: Tuple[str, ...]) -> str:
+    """Basic image generation prompt; repeated during LLM outages, so memoized"""
+    return f"""
+Create a clean, modern UI mockup for {purpose}.
+Target audience: {audience}
+Key features: {', '.join(use_cases)}
+Style: Clean, professional, mobile-friendly interface with good typography and spacing.
+Include: Header navigation, main content area, clear call-to-action buttons.
+Color scheme: Modern, accessible colors with good contrast ratios.
+"""
+
 class UXGenerator:
     """
     UX Generator service that orchestrates the generation of UX specifications
@@ -23,56 +84,145 @@ class UXGenerator:
         Generate comprehensive UX specifications from requirements
         """
         try:
-            logger.info(f"Starting UX specification generation for: {requirements.purpose}")
+            logger.info("Starting UX specification generation for: %s", requirements.purpose)
             
-            # Step 1: Multi-role analysis if enabled
+            # Steps 1 & 2: Multi-role analysis if enabled, then detailed UX specifications
             role_insights = None
             if requirements.simulateRoles:
-                logger.info("Generating multi-role AI analysis")
-                role_insights_dict = await self.llm_service.generate_multi_role_analysis(
+                role_insights_dict, ux_specs = await self._generate_with_role_insights(
                     requirements, preferred_model
                 )
-                role_insights = RoleInsight(**role_insights_dict)
-            
-            # Step 2: Generate detailed UX specifications
-            logger.info("Generating detailed UX specifications")
-            ux_specs_dict = await self.llm_service.generate_ux_specifications(
-                requirements, 
-                role_insights_dict if role_insights else None
-            )
+                role_insights = RoleInsight.model_construct(**role_insights_dict)
+            else:
+                logger.info("Generating detailed UX specifications")
+                ux_specs = await self.llm_service.generate_ux_specifications(requirements, None)
             
             # Step 3: Parse and structure the response
-            screens = []
-            for screen_data in ux_specs_dict.get("screens", []):
-                screen = ScreenElement(
-                    name=screen_data.get("name", "Untitled Screen"),
-                    description=screen_data.get("description", ""),
-                    elements=screen_data.get("elements", []),
-                    userFlow=screen_data.get("userFlow"),
-                    interactions=screen_data.get("interactions", [])
+            # LLM output is already decoded and type-checked with defaults
+            # filled in; skip validation here, response_model validates at the
+            # API boundary
+            make_screen = ScreenElement.model_construct
+            screens = [
+                make_screen(
+                    name=screen.name,
+                    description=screen.description,
+                    elements=screen.elements,
+                    userFlow=screen.userFlow,
+                    interactions=screen.interactions
                 )
-                screens.append(screen)
+                for screen in ux_specs.screens
+            ]
             
             # Step 4: Create final UX specification
-            ux_specification = UXSpecification(
+            ux_specification = UXSpecification.model_construct(
                 roleInsights=role_insights,
                 screens=screens,
-                ia_structure=ux_specs_dict.get("ia_structure", {}),
-                standards=ux_specs_dict.get("standards", {}),
-                final_prompt_for_image_model=ux_specs_dict.get(
-                    "final_prompt_for_image_model", 
-                    self._generate_fallback_prompt(requirements)
-                )
+                ia_structure=ux_specs.ia_structure,
+                standards=ux_specs.standards,
+                # Only build the fallback prompt when the LLM left it out
+                final_prompt_for_image_model=ux_specs.final_prompt_for_image_model
+                    or self._generate_fallback_prompt(requirements)
             )
             
-            logger.info(f"Successfully generated UX specifications with {len(screens)} screens")
+            logger.info("Successfully generated UX specifications with %d screens", len(screens))
             return ux_specification
             
         except Exception as e:
-            logger.error(f"Error generating UX specifications: {str(e)}")
+            logger.error("Error generating UX specifications: %s", e)
             # Return fallback specifications
             return await self._generate_fallback_specifications(requirements)
     
+    async def stream_specifications(
+        self,
+        requirements: RequirementsInput,
+        preferred_model: AIModel = AIModel.LLAMA3_70B
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Generate UX specifications as a stream of (event, data) pairs
+        Emits role_insights (when enabled), one screen event per screen and
+        a final done event carrying the rest of the specification.
+        """
+        logger.info("Starting streamed UX specification generation for: %s", requirements.purpose)
+        
+        role_insights_dict = None
+        if requirements.simulateRoles:
+            role_insights_dict = await self.llm_service.generate_multi_role_analysis(
+                requirements, preferred_model
+            )
+            yield "role_insights", role_insights_dict
+        
+        screens_sent = 0
+        try:
+            ux_specs = UXSpecsMsg()
+            async for kind, data in self.llm_service.stream_ux_specifications(requirements, role_insights_dict):
+                if kind == "spec":
+                    ux_specs = data
+                    continue
+                yield "screen", msgspec.structs.asdict(data)
+                screens_sent += 1
+            
+            yield "done", {
+                "ia_structure": ux_specs.ia_structure,
+                "standards": ux_specs.standards,
+                "final_prompt_for_image_model": ux_specs.final_prompt_for_image_model
+                    or self._generate_fallback_prompt(requirements)
+            }
+            logger.info("Successfully streamed UX specifications with %d screens", screens_sent)
+            
+        except Exception as e:
+            logger.error("Error streaming UX specifications: %s", e)
+            if screens_sent:
+                # Screens already reached the client; don't mix in fallback ones
+                yield "error", {"detail": "UX specification generation failed"}
+                return
+            
+            fallback = await self._generate_fallback_specifications(requirements)
+            for screen in fallback.screens:
+                yield "screen", screen.model_dump()
+            yield "done", fallback.model_dump(include={"ia_structure", "standards", "final_prompt_for_image_model"})
+    
+    async def _generate_with_role_insights(
+        self,
+        requirements: RequirementsInput,
+        preferred_model: AIModel
+    ) -> Tuple[Dict[str, str], UXSpecsMsg]:
+        """
+        Run multi-role analysis and UX spec generation with speculative overlap.
+        A spec without role insights starts alongside the analysis; if the
+        analysis finishes within ROLE_INSIGHTS_TIMEOUT the speculative spec is
+        cancelled and regenerated with the insights, otherwise it is used as is.
+        """
+        logger.info("Generating multi-role AI analysis")
+        role_task = asyncio.create_task(
+            self.llm_service.generate_multi_role_analysis(requirements, preferred_model)
+        )
+        # Not batched: cancelling a batched prompt would not stop its generation
+        speculative_spec_task = asyncio.create_task(
+            self.llm_service.generate_ux_specifications(requirements, None, batchable=False)
+        )
+        
+        try:
+            done, _ = await asyncio.wait({role_task}, timeout=ROLE_INSIGHTS_TIMEOUT)
+            
+            if role_task in done:
+                speculative_spec_task.cancel()
+                role_insights_dict = role_task.result()
+                logger.info("Generating detailed UX specifications")
+                ux_specs = await self.llm_service.generate_ux_specifications(
+                    requirements, role_insights_dict
+                )
+            else:
+                logger.info("Multi-role analysis still running, using speculative UX specifications")
+                ux_specs = await speculative_spec_task
+                role_insights_dict = await role_task
+            
+            return role_insights_dict, ux_specs
+            
+        finally:
+            for task in (role_task, speculative_spec_task):
+                if not task.done():
+                    task.cancel()
+    
     async def _generate_fallback_specifications(self, requirements: RequirementsInput) -> UXSpecification:
         """Generate basic fallback specifications when LLM fails"""
         logger.warning("Generating fallback UX specifications")
@@ -91,13 +241,7 @@ class UXGenerator:
         
         # Main feature screens based on use cases
         for i, use_case in enumerate(requirements.useCases[:3]):  # Limit to 3 screens
-            screen_name = f"Feature {i+1}"
-            if "log" in use_case.lower() or "track" in use_case.lower():
-                screen_name = "Tracking"
-            elif "view" in use_case.lower() or "browse" in use_case.lower():
-                screen_name = "Browse"
-            elif "manage" in use_case.lower() or "edit" in use_case.lower():
-                screen_name = "Management"
+            screen_name = _fallback_screen_name(use_case) or f"Feature {i+1}"
             
             screens.append(ScreenElement(
                 name=screen_name,
@@ -107,33 +251,18 @@ class UXGenerator:
                 interactions=["input_data", "submit_form", "view_results"]
             ))
         
-        return UXSpecification(
-            roleInsights=RoleInsight(
-                designer="Focus on clean, intuitive interface design with clear visual hierarchy",
-                analyst="Ensure all user requirements are met with efficient workflows",
-                architect="Structure information logically with scalable navigation patterns"
-            ),
+        return UXSpecification.model_construct(
+            roleInsights=FALLBACK_ROLE_INSIGHTS,
             screens=screens,
-            ia_structure={
-                "navigation": "Top-level navigation with clear categories",
-                "hierarchy": "Dashboard → Feature screens → Detail views",
-                "relationships": "Linear flow with cross-navigation options"
-            },
-            standards={
-                "accessibility": "WCAG 2.1 AA compliance with proper ARIA labels",
-                "responsive": "Mobile-first design with breakpoints at 768px and 1024px",
-                "patterns": "Material Design principles with consistent spacing and typography"
-            },
+            ia_structure=FALLBACK_IA_STRUCTURE,
+            standards=FALLBACK_STANDARDS,
             final_prompt_for_image_model=self._generate_fallback_prompt(requirements)
         )
     
     def _generate_fallback_prompt(self, requirements: RequirementsInput) -> str:
         """Generate a basic prompt for image generation"""
-        return f"""
-Create a clean, modern UI mockup for {requirements.purpose}.
-Target audience: {requirements.audience}
-Key features: {', '.join(requirements.useCases[:3])}
-Style: Clean, professional, mobile-friendly interface with good typography and spacing.
-Include: Header navigation, main content area, clear call-to-action buttons.
-Color scheme: Modern, accessible colors with good contrast ratios.
-""" 
\ No newline at end of file
+        return _fallback_prompt(
+            requirements.purpose,
+            requirements.audience,
+            tuple(requirements.useCases[:3])
+        )
@@ -1,18 +1,48 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
 import uvicorn
+import asyncio
+import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 
+# Load environment variables before the app modules read their settings
+load_dotenv()
+
+from app.compression import GZipExceptStreamsMiddleware
+from app.models.schemas import UXSpecification
+from app.request_context import RequestIdFilter, RequestIdMiddleware
 from app.routes.health import router as health_router
 from app.routes.requirements import router as requirements_router
 from app.routes.design import router as design_router
 from app.routes.screens import router as screens_router
 from app.routes.models import router as models_router
+from app.services.cached_llm_service import CachedLLMService
+from app.services.llm_service import create_http_client
+from app.services.ux_generator import UXGenerator
 
-# Load environment variables
-load_dotenv()
+def configure_logging() -> QueueListener:
+    """
+    Send log records through a queue so formatting and stream I/O happen
+    on a background thread instead of blocking the event loop
+    """
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:[%(request_id)s] %(message)s")
+    root = logging.getLogger()
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+    # Handler filters run in the caller's context, where the request id is set
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    root.handlers = [queue_handler]
+    listener.start()
+    return listener
+
+log_listener = configure_logging()
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -20,7 +50,8 @@ app = FastAPI(
     description="AI-Powered UX Design Generator API - Transform text requirements into UX wireframes and UI mockups",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -33,16 +64,69 @@ app.add_middleware(
         "https://tuxonline.live",  # Production domain without www
     ],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization", "X-Request-ID"],
+    expose_headers=["X-Request-ID"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
-# Global exception handler
+# One pooled HTTP/2 client and set of services shared by every request
+@app.on_event("startup")
+async def create_llm_clients():
+    app.state.http = create_http_client()
+    app.state.llm_service = CachedLLMService(http_client=app.state.http)
+    app.state.ux_generator = UXGenerator(app.state.llm_service)
+
+# Pay one-off initialization costs at boot instead of on the first request
+@app.on_event("startup")
+async def warm_up():
+    sample = UXSpecification.model_validate({
+        "screens": [{"name": "Home", "description": "", "elements": ["header"]}],
+        "ia_structure": {},
+        "standards": {},
+        "final_prompt_for_image_model": ""
+    })
+    ORJSONResponse(jsonable_encoder(sample))
+    
+    # Opens provider connections in the background; startup doesn't wait on the LLMs
+    app.state.llm_warmup = None
+    if os.getenv("LLM_WARMUP", "1") != "0":
+        app.state.llm_warmup = asyncio.create_task(app.state.llm_service.healthcheck())
+
+# Release pooled LLM provider connections on shutdown
+@app.on_event("shutdown")
+async def close_llm_clients():
+    if app.state.llm_warmup is not None:
+        app.state.llm_warmup.cancel()
+    await app.state.llm_service.aclose()
+    await app.state.http.aclose()
+
+# Flush queued log records; registered last so shutdown logging is included
+@app.on_event("shutdown")
+async def stop_log_listener():
+    log_listener.stop()
+
+# Compress large JSON responses; SSE streams must reach the client unbuffered
+app.add_middleware(
+    GZipExceptStreamsMiddleware,
+    stream_paths={"/api/generate-design/stream"},
+    minimum_size=1024,
+    compresslevel=5
+)
+
+# Tag every request (and its log lines) with an id
+app.add_middleware(RequestIdMiddleware)
+
+# Global exception handler; only logs (through the queue) and responds,
+# so nothing here blocks the event loop
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    return JSONResponse(
+    # Runs outside the request id middleware, so take the id from request.state
+    rid = getattr(request.state, "request_id", "-")
+    logger.error("Unhandled exception: %s", exc, exc_info=exc, extra={"request_id": rid})
+    return ORJSONResponse(
         status_code=500,
-        content={"detail": "An internal server error occurred"}
+        content={"detail": "An internal server error occurred", "request_id": rid}
     )
 
 # Root endpoint
@@ -63,9 +147,17 @@ app.include_router(models_router, prefix="/api", tags=["models"])
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
+    development = os.getenv("ENVIRONMENT") == "development"
+    # Reload only works with a single process
+    workers = 1 if development else int(os.getenv("WORKERS", "4"))
+    # Worker processes inherit this and split the provider rate limits by it
+    os.environ["WORKERS"] = str(workers)
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=port,
-        reload=True if os.getenv("ENVIRONMENT") == "development" else False
-    ) 
\ No newline at end of file
+        loop="uvloop",
+        http="httptools",
+        reload=development,
+        workers=workers
+    )
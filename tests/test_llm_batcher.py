@@ -0,0 +1,85 @@
+import asyncio
+import httpx
+import pytest
+from app.services.errors import LLMProviderError
+from app.services.llm_batcher import LLMBatcher
+
+URL = "https://batch.example/v1/completions"
+
+class FakePost:
+    """Stands in for LLMService._post; records each batched request"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = []
+
+    async def __call__(self, url, **kwargs):
+        self.calls.append(kwargs["json"])
+        return self.respond(kwargs["json"])
+
+async def _submit_all(batcher, prompts, model_name="model"):
+    try:
+        return await asyncio.gather(
+            *(batcher.submit(prompt, model_name) for prompt in prompts),
+            return_exceptions=True
+        )
+    finally:
+        await batcher.aclose()
+
+@pytest.mark.asyncio
+async def test_choices_are_mapped_back_to_their_callers():
+    # Choices come back out of order; their index says which prompt they answer
+    post = FakePost(lambda body: httpx.Response(200, json={
+        "choices": [
+            {"index": i, "text": f"completion of {prompt}"}
+            for i, prompt in reversed(list(enumerate(body["prompt"])))
+        ]
+    }))
+    prompts = ["a", "b", "c"]
+
+    results = await _submit_all(LLMBatcher(post, URL, max_wait=0.05), prompts)
+
+    assert results == ["completion of a", "completion of b", "completion of c"]
+    assert len(post.calls) == 1
+    assert post.calls[0]["prompt"] == prompts
+
+@pytest.mark.asyncio
+async def test_prompts_for_different_models_are_sent_separately():
+    post = FakePost(lambda body: httpx.Response(200, json={
+        "choices": [{"index": 0, "text": body["model"]}]
+    }))
+    batcher = LLMBatcher(post, URL, max_wait=0.05)
+
+    try:
+        results = await asyncio.gather(batcher.submit("a", "small"), batcher.submit("b", "large"))
+    finally:
+        await batcher.aclose()
+
+    assert results == ["small", "large"]
+    assert sorted(call["model"] for call in post.calls) == ["large", "small"]
+
+@pytest.mark.asyncio
+async def test_missing_choice_fails_only_its_caller():
+    post = FakePost(lambda body: httpx.Response(200, json={"choices": [{"index": 0, "text": "first"}]}))
+
+    first, second = await _submit_all(LLMBatcher(post, URL, max_wait=0.05), ["a", "b"])
+
+    assert first == "first"
+    assert isinstance(second, LLMProviderError)
+
+@pytest.mark.asyncio
+async def test_error_response_releases_every_caller():
+    post = FakePost(lambda body: httpx.Response(503, text="overloaded"))
+
+    results = await _submit_all(LLMBatcher(post, URL, max_wait=0.05), ["a", "b", "c"])
+
+    assert all(isinstance(result, LLMProviderError) for result in results)
+
+@pytest.mark.asyncio
+async def test_failed_request_releases_every_caller():
+    def respond(body):
+        raise httpx.ConnectError("connection refused")
+
+    results = await _submit_all(LLMBatcher(FakePost(respond), URL, max_wait=0.05), ["a", "b", "c"])
+
+    assert all(isinstance(result, httpx.ConnectError) for result in results)
@@ -0,0 +1,78 @@
+import asyncio
+import httpx
+import pytest
+from app.services import llm_service
+from app.services.llm_service import LLM_MAX_ATTEMPTS, LLMService
+from app.services.rate_limiter import RateLimiter
+
+URL = "https://api.together.xyz/inference"
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records backoff delays instead of sleeping through them"""
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(llm_service, "_sleep", fake_sleep)
+    return delays
+
+async def _send(responses):
+    """Send one request through _send against canned responses; returns (response, request count)"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return responses[min(len(calls), len(responses)) - 1]
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        service = LLMService(http_client=client)
+        response = await service._send("together", client.build_request("POST", URL, json={}))
+        await service.aclose()
+    return response, len(calls)
+
+@pytest.mark.asyncio
+async def test_retry_honours_retry_after(sleeps):
+    response, calls = await _send([
+        httpx.Response(429, headers={"Retry-After": "7"}),
+        httpx.Response(200, json={"output": "ok"})
+    ])
+
+    assert response.status_code == 200
+    assert calls == 2
+    assert sleeps == [7.0]
+
+@pytest.mark.asyncio
+async def test_retry_after_is_capped(sleeps):
+    await _send([httpx.Response(429, headers={"Retry-After": "3600"}), httpx.Response(200)])
+
+    assert sleeps == [30.0]
+
+@pytest.mark.asyncio
+async def test_last_response_returned_once_attempts_run_out(sleeps):
+    response, calls = await _send([httpx.Response(429, headers={"Retry-After": "1"})])
+
+    assert response.status_code == 429
+    assert calls == LLM_MAX_ATTEMPTS
+    assert sleeps == [1.0] * (LLM_MAX_ATTEMPTS - 1)
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(sleeps):
+    response, calls = await _send([httpx.Response(400), httpx.Response(200)])
+
+    assert response.status_code == 400
+    assert calls == 1
+    assert sleeps == []
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spreads_out_bursts():
+    limiter = RateLimiter(2, period=0.2)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    for _ in range(3):
+        await limiter.acquire()
+
+    # Two requests fit in the bucket; the third waits for a token to refill
+    assert loop.time() - start >= 0.09
@@ -0,0 +1,51 @@
+import json
+import msgspec
+import pytest
+from app.models.llm_output import ScreenMsg
+from app.services.errors import LLMProviderError
+from app.services.llm_service import _ScreenStreamParser
+
+SPEC = {
+    # A nested "screens" key must not be mistaken for the top-level array
+    "ia_structure": {"screens": [{"name": "Not a screen"}]},
+    "screens": [
+        {
+            "name": "Log {in}",
+            "description": 'Say "hi" [now] \\',
+            "elements": ["}", "]", "{\"nested\": [1]}"],
+            "interactions": ["tap \"Go\""]
+        },
+        {"name": "Home", "elements": [], "userFlow": "C:\\"}
+    ],
+    "standards": {"screens": [{"name": "Not a screen either"}]}
+}
+# Prose before the object, and stray braces after it
+TEXT = "Here is the specification:\n```json\n" + json.dumps(SPEC, indent=2) + "\n```\nHope this helps }{"
+EXPECTED = [msgspec.convert(screen, ScreenMsg) for screen in SPEC["screens"]]
+
+def _parse(chunks):
+    parser = _ScreenStreamParser()
+    screens = []
+    for chunk in chunks:
+        screens.extend(parser.feed(chunk))
+    return screens
+
+def test_whole_text():
+    assert _parse([TEXT]) == EXPECTED
+
+@pytest.mark.parametrize("offset", range(len(TEXT) + 1))
+def test_split_at_every_offset(offset):
+    assert _parse([TEXT[:offset], TEXT[offset:]]) == EXPECTED
+
+def test_one_character_at_a_time():
+    assert _parse(TEXT) == EXPECTED
+
+def test_screens_are_emitted_as_they_close():
+    parser = _ScreenStreamParser()
+    first_end = TEXT.index('"Home"')
+    assert parser.feed(TEXT[:first_end]) == EXPECTED[:1]
+    assert parser.feed(TEXT[first_end:]) == EXPECTED[1:]
+
+def test_invalid_screen_raises():
+    with pytest.raises(LLMProviderError):
+        _parse(['{"screens": [{"name": 42}]}'])